@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from functools import lru_cache
+from functools import cache
 
 
 class Settings(BaseSettings):
@@ -12,15 +12,21 @@ class Settings(BaseSettings):
     
     # Database
     database_url: str = "sqlite+aiosqlite:///./data/yanb_sync.db"
+    db_pool_size: int = 20
+    db_max_overflow: int = 10
+    db_pool_recycle: int = 1800  # seconds
     
     # Security
     secret_key: str = "change-this-in-production"
+    # Comma-separated origins allowed to call the API from another host.
+    # Empty means same-origin only (the bundled frontend needs nothing else).
+    cors_origins: str = ""
     
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
 
 
-@lru_cache()
+@cache
 def get_settings() -> Settings:
     return Settings()
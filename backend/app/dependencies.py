@@ -1,39 +1,111 @@
+import asyncio
 from typing import AsyncGenerator
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker
+from fastapi import Request
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, StaticPool
 
 from .config import get_settings
+from .services.akahu_client import AkahuClient
+from .services.ynab_client import YNABClient
 
-# Create engine and session factory
-_engine = None
-_session_factory = None
 
+def engine_options(database_url: str) -> dict:
+    """Connection pool settings for the configured database backend."""
+    settings = get_settings()
 
-async def get_engine():
-    global _engine
-    if _engine is None:
-        settings = get_settings()
-        _engine = create_async_engine(settings.database_url, echo=False)
-    return _engine
+    if database_url.startswith("sqlite"):
+        if ":memory:" in database_url:
+            # Each connection to an in-memory database is a separate, empty
+            # database, so every session has to share the one connection.
+            return {"poolclass": StaticPool}
+        # aiosqlite defaults to NullPool for file databases, which opens a new
+        # connection (and worker thread) for every session.  Pre-ping and
+        # recycling are pointless for a local file.
+        return {
+            "poolclass": AsyncAdaptedQueuePool,
+            "pool_size": settings.db_pool_size,
+            "max_overflow": settings.db_max_overflow,
+        }
 
+    return {
+        "poolclass": AsyncAdaptedQueuePool,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_pre_ping": True,
+        "pool_recycle": settings.db_pool_recycle,
+    }
 
-async def get_session_factory():
-    global _session_factory
-    if _session_factory is None:
-        engine = await get_engine()
-        _session_factory = sessionmaker(
-            engine,
-            class_=AsyncSession,
-            expire_on_commit=False
-        )
-    return _session_factory
 
+def build_engine(database_url: str) -> AsyncEngine:
+    """Create the application's async engine with a tuned connection pool."""
+    return create_async_engine(database_url, echo=False, **engine_options(database_url))
 
-async def get_db() -> AsyncGenerator[AsyncSession, None]:
+
+async def warm_pool(engine: AsyncEngine, size: int) -> None:
+    """
+    Open and return *size* connections so the pool starts out populated.
+
+    SQLAlchemy never pre-creates connections, so without this the first burst
+    of requests after boot each pays the full connect/auth round-trip.
+    """
+    conns = await asyncio.gather(*(engine.connect() for _ in range(size)))
+    await asyncio.gather(*(conn.close() for conn in conns))
+
+
+def build_session_factory(engine: AsyncEngine, **options) -> async_sessionmaker[AsyncSession]:
+    return async_sessionmaker(engine, expire_on_commit=False, **options)
+
+
+async def get_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
     """Dependency for getting database sessions."""
-    session_factory = await get_session_factory()
-    async with session_factory() as session:
-        try:
-            yield session
-        finally:
-            await session.close()
+    async with request.app.state.session_factory() as session:
+        yield session
+
+
+def get_session_factory(request: Request) -> async_sessionmaker[AsyncSession]:
+    """
+    Dependency for work that spans external API calls.
+
+    Such routes open short sessions per database step instead of holding one
+    (and its pooled connection) for the whole request.
+    """
+    return request.app.state.session_factory
+
+
+async def get_readonly_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency for routes that only read.
+
+    The session never autoflushes and is never committed; its transaction is
+    rolled back when the request finishes.
+    """
+    async with request.app.state.readonly_session_factory() as session:
+        yield session
+
+
+def get_readonly_session_factory(request: Request) -> async_sessionmaker[AsyncSession]:
+    """
+    Read-only session factory, for streamed responses.
+
+    Dependency cleanup runs before a StreamingResponse body is sent, so a
+    streaming route has to open its session inside the body generator.
+    """
+    return request.app.state.readonly_session_factory
+
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def wants_ndjson(request: Request) -> bool:
+    """Dependency: whether the client asked for newline-delimited JSON."""
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def get_akahu(request: Request) -> AkahuClient:
+    """Dependency for the shared Akahu client."""
+    return request.app.state.akahu
+
+
+def get_ynab(request: Request) -> YNABClient:
+    """Dependency for the shared YNAB client."""
+    return request.app.state.ynab
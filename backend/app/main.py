@@ -4,12 +4,16 @@ from contextlib import asynccontextmanager
 from pathlib import Path
 
 from fastapi import FastAPI
+from starlette.exceptions import HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, ORJSONResponse
 
 from .config import get_settings
+from .dependencies import build_engine, build_session_factory, warm_pool
 from .models.database import init_db
+from .services.akahu_client import AkahuClient
+from .services.ynab_client import YNABClient
 from .routers import csv_router, ynab_router, akahu_router, mappings_router
 from .services.scheduler import initialize_scheduler, shutdown_scheduler, cleanup_stale_syncs
 
@@ -31,17 +35,33 @@ async def lifespan(app: FastAPI):
     data_dir = Path("./data")
     data_dir.mkdir(exist_ok=True)
     
+    # Create the shared engine and session factory once, before any request
+    engine = build_engine(settings.database_url)
+    app.state.engine = engine
+    app.state.session_factory = build_session_factory(engine)
+    app.state.readonly_session_factory = build_session_factory(engine, autoflush=False)
+
+    # Pre-open pooled connections for server databases (pointless for SQLite)
+    if not settings.database_url.startswith("sqlite"):
+        await warm_pool(engine, settings.db_pool_size)
+        logger.info(f"Warmed {settings.db_pool_size} database connections")
+
+    # Shared API clients, reused by every request
+    app.state.akahu = AkahuClient()
+    app.state.ynab = YNABClient()
+
     # Initialize database
-    await init_db(settings.database_url)
+    await init_db(engine)
     logger.info("Database initialized")
 
     # Clean up any syncs left in 'running' state from a previous crash/restart
-    cleaned = await cleanup_stale_syncs()
+    async with app.state.session_factory() as session:
+        cleaned = await cleanup_stale_syncs(session)
     if cleaned:
         logger.info(f"Cleaned up {cleaned} stale sync(s)")
 
-    # Initialize scheduler for Akahu sync
-    await initialize_scheduler()
+    # Initialize scheduler for Akahu sync, on the shared engine
+    await initialize_scheduler(app.state.session_factory)
     logger.info("Scheduler initialized")
     
     yield
@@ -50,23 +70,33 @@ async def lifespan(app: FastAPI):
     await shutdown_scheduler()
     logger.info("Scheduler shut down")
 
+    await app.state.akahu.aclose()
+    await app.state.ynab.aclose()
+    await engine.dispose()
+
 
 # Create FastAPI app
 app = FastAPI(
     title="YANB Sync",
     description="YNAB Transaction Import Application - Import transactions from CSV or Akahu to YNAB",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
-# Configure CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # In production, specify allowed origins
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+# Configure CORS only for explicitly allowed origins; the bundled frontend
+# is served from the same origin and needs no CORS handling at all
+cors_origins = [
+    origin.strip() for origin in get_settings().cors_origins.split(",") if origin.strip()
+]
+if cors_origins:
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=cors_origins,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
 
 # Include API routers
 app.include_router(csv_router, prefix="/api")
@@ -99,31 +129,42 @@ for fp in frontend_paths:
         frontend_path = fp
         break
 
+
+class FrontendFiles(StaticFiles):
+    """Static files that fall back to index.html for anything missing."""
+
+    def __init__(self, *, index: str, **kwargs):
+        super().__init__(**kwargs)
+        self.index = index
+
+    async def get_response(self, path: str, scope):
+        try:
+            return await super().get_response(path, scope)
+        except HTTPException as exc:
+            if exc.status_code != 404:
+                raise
+            return FileResponse(self.index)
+
+
 if frontend_path:
+    # Resolved once at import; handlers just hand the string to FileResponse
+    index_html = str(frontend_path / "index.html")
+
     app.mount("/static", StaticFiles(directory=str(frontend_path)), name="static")
     
     @app.get("/")
     async def serve_frontend():
         """Serve the frontend application."""
-        return FileResponse(str(frontend_path / "index.html"))
-    
-    # Serve JS files
-    @app.get("/js/{filename:path}")
-    async def serve_js(filename: str):
-        """Serve JavaScript files."""
-        file_path = frontend_path / "js" / filename
-        if file_path.exists() and file_path.is_file():
-            return FileResponse(str(file_path))
-        return FileResponse(str(frontend_path / "index.html"))
+        return FileResponse(index_html)
     
-    # Serve CSS files
-    @app.get("/css/{filename:path}")
-    async def serve_css(filename: str):
-        """Serve CSS files."""
-        file_path = frontend_path / "css" / filename
-        if file_path.exists() and file_path.is_file():
-            return FileResponse(str(file_path))
-        return FileResponse(str(frontend_path / "index.html"))
+    # Serve JS and CSS directly from disk, without going through the router
+    for asset_dir in ("js", "css"):
+        if (frontend_path / asset_dir).is_dir():
+            app.mount(
+                f"/{asset_dir}",
+                FrontendFiles(directory=str(frontend_path / asset_dir), index=index_html),
+                name=asset_dir,
+            )
 
 
 if __name__ == "__main__":
@@ -1,10 +1,13 @@
-from datetime import datetime
-from sqlalchemy import Column, String, Integer, Float, DateTime, Text, Boolean, JSON
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy import Column, String, Integer, Float, DateTime, Text, Boolean, JSON, Index, func
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import declarative_base
 
 Base = declarative_base()
 
+# Timestamps are filled in by the database (CURRENT_TIMESTAMP, in UTC). The
+# default= half puts func.now() into each INSERT, so databases created before
+# the server_default existed still get a value.
+
 
 class ImportedTransaction(Base):
     """Track imported transactions to prevent duplicates."""
@@ -17,7 +20,7 @@ class ImportedTransaction(Base):
     
     # Original transaction data
     date = Column(DateTime, nullable=False)
-    amount = Column(Float, nullable=False)
+    amount_milliunits = Column(Integer, nullable=False)  # YNAB milliunits (dollars × 1000)
     payee = Column(String(255), nullable=True)
     memo = Column(Text, nullable=True)
     
@@ -32,8 +35,8 @@ class ImportedTransaction(Base):
     ynab_transaction_id = Column(String(255), nullable=True)
     
     # Metadata
-    imported_at = Column(DateTime, default=datetime.utcnow)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    imported_at = Column(DateTime, default=func.now(), server_default=func.now())
+    created_at = Column(DateTime, default=func.now(), server_default=func.now())
 
 
 class MappingProfile(Base):
@@ -61,8 +64,8 @@ class MappingProfile(Base):
     default_ynab_account_id = Column(String(255), nullable=True)
     
     is_default = Column(Boolean, default=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, default=func.now(), server_default=func.now())
+    updated_at = Column(DateTime, default=func.now(), server_default=func.now(), onupdate=func.now())
 
 
 class AkahuAccount(Base):
@@ -92,8 +95,8 @@ class AkahuAccount(Base):
     last_sync_message = Column(Text, nullable=True)
     last_sync_imported = Column(Integer, default=0)
     
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, default=func.now(), server_default=func.now())
+    updated_at = Column(DateTime, default=func.now(), server_default=func.now(), onupdate=func.now())
 
 
 class SyncLog(Base):
@@ -105,7 +108,7 @@ class SyncLog(Base):
     account_name = Column(String(255), nullable=True)
 
     # Sync details
-    started_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, default=func.now(), server_default=func.now(), index=True)
     completed_at = Column(DateTime, nullable=True)
     status = Column(String(50), nullable=False)  # 'success', 'failed', 'running'
     
@@ -131,18 +134,13 @@ class SyncLog(Base):
     reconciliation_passes = Column(Integer, nullable=True)
     reconciliation_window_days = Column(Integer, nullable=True)
 
-
-# Database setup functions
-async def get_engine(database_url: str):
-    return create_async_engine(database_url, echo=False)
-
-
-async def get_session_maker(engine):
-    return sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    __table_args__ = (
+        # Serves the per-account sync log listing (newest first)
+        Index("ix_sync_logs_account_started", "akahu_account_id", started_at.desc()),
+    )
 
 
-async def init_db(database_url: str):
-    engine = await get_engine(database_url)
+# Database setup functions
+async def init_db(engine: AsyncEngine):
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
-    return engine
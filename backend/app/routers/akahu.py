@@ -1,15 +1,24 @@
 from datetime import datetime, timedelta
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional
+import orjson
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlalchemy import select
 
-from ..dependencies import get_db
+from ..dependencies import (
+    get_db,
+    get_readonly_db,
+    get_readonly_session_factory,
+    get_session_factory,
+    get_akahu,
+    get_ynab,
+)
 from ..services.akahu_client import AkahuClient
 from ..services.ynab_client import YNABClient
 from ..services.dedup import DeduplicationService
 from ..services.scheduler import schedule_account_sync, remove_account_schedule, get_scheduled_jobs, cleanup_stale_syncs
-from ..services.reconciliation import check_and_reconcile
+from ..services.account_sync import sync_account, AccountNotLinkedError, SyncFailedError
 from ..models.database import AkahuAccount, SyncLog
 from ..schemas.akahu import (
     AkahuAccountResponse,
@@ -19,15 +28,21 @@ from ..schemas.akahu import (
     SyncLogResponse,
     ScheduledJobInfo
 )
-from ..schemas.transaction import TransactionCreate
 
 router = APIRouter(prefix="/akahu", tags=["Akahu"])
 
+# Supported schedule intervals (hours), and the nearest one for every value
+# ScheduleConfig accepts (1-24)
+VALID_INTERVALS = (1, 2, 4, 6, 12, 24)
+NEAREST_INTERVAL = {
+    hours: min(VALID_INTERVALS, key=lambda x: abs(x - hours))
+    for hours in range(1, 25)
+}
+
 
 @router.get("/test")
-async def test_akahu_connection():
+async def test_akahu_connection(akahu: AkahuClient = Depends(get_akahu)):
     """Test the Akahu API connection."""
-    akahu = AkahuClient()
     connected = await akahu.test_connection()
     
     if connected:
@@ -40,22 +55,27 @@ async def test_akahu_connection():
 
 
 @router.get("/accounts", response_model=List[AkahuAccountResponse])
-async def get_akahu_accounts(db: AsyncSession = Depends(get_db)):
+async def get_akahu_accounts(
+    db: AsyncSession = Depends(get_readonly_db),
+    akahu: AkahuClient = Depends(get_akahu)
+):
     """Get all connected Akahu bank accounts with their YNAB links."""
-    akahu = AkahuClient()
-    
     try:
-        accounts = await akahu.get_accounts()
+        accounts = await akahu.get_accounts_cached()
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch Akahu accounts: {str(e)}")
     
-    # Enrich with saved link information
-    for account in accounts:
-        result = await db.execute(
-            select(AkahuAccount).where(AkahuAccount.akahu_account_id == account.id)
+    # Enrich with saved link information, loaded in a single query
+    result = await db.execute(
+        select(AkahuAccount).where(
+            AkahuAccount.akahu_account_id.in_([a.id for a in accounts])
         )
-        saved = result.scalar_one_or_none()
-        
+    )
+    saved_by_id = {row.akahu_account_id: row for row in result.scalars().all()}
+
+    for account in accounts:
+        saved = saved_by_id.get(account.id)
+
         if saved:
             account.ynab_budget_id = saved.ynab_budget_id
             account.ynab_account_id = saved.ynab_account_id
@@ -76,7 +96,8 @@ async def get_akahu_accounts(db: AsyncSession = Depends(get_db)):
 @router.post("/accounts/link")
 async def link_akahu_to_ynab(
     link: AkahuAccountLink,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    akahu: AkahuClient = Depends(get_akahu)
 ):
     """Link an Akahu account to a YNAB account."""
     # Check if link already exists
@@ -92,12 +113,10 @@ async def link_akahu_to_ynab(
         existing.ynab_budget_id = link.ynab_budget_id
         existing.ynab_account_id = link.ynab_account_id
         existing.auto_sync = link.auto_sync
-        existing.updated_at = datetime.utcnow()
     else:
         # Create new link
         # Get account details from Akahu
-        akahu = AkahuClient()
-        accounts = await akahu.get_accounts()
+        accounts = await akahu.get_accounts_cached()
         account_info = next(
             (a for a in accounts if a.id == link.akahu_account_id),
             None
@@ -115,6 +134,7 @@ async def link_akahu_to_ynab(
         db.add(new_link)
     
     await db.commit()
+    akahu.invalidate_accounts_cache()
     
     return {"status": "success", "message": "Account linked successfully"}
 
@@ -122,7 +142,8 @@ async def link_akahu_to_ynab(
 @router.delete("/accounts/{akahu_account_id}/link")
 async def unlink_akahu_account(
     akahu_account_id: str,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    akahu: AkahuClient = Depends(get_akahu)
 ):
     """Remove the link between an Akahu and YNAB account."""
     result = await db.execute(
@@ -135,6 +156,7 @@ async def unlink_akahu_account(
     if existing:
         await db.delete(existing)
         await db.commit()
+        akahu.invalidate_accounts_cache()
     
     return {"status": "success", "message": "Account unlinked"}
 
@@ -143,46 +165,83 @@ async def unlink_akahu_account(
 async def get_akahu_transactions(
     account_id: Optional[str] = None,
     days: int = Query(default=30, ge=1, le=365),
-    db: AsyncSession = Depends(get_db)
+    session_factory: async_sessionmaker[AsyncSession] = Depends(get_readonly_session_factory),
+    akahu: AkahuClient = Depends(get_akahu)
 ):
-    """Get transactions from Akahu for preview."""
-    akahu = AkahuClient()
-    
+    """
+    Get transactions from Akahu for preview.
+
+    The JSON array is streamed page by page as Akahu returns them, so large
+    windows are never held in memory all at once.  Each page's hashes are
+    looked up the same way a sync looks them up, so is_duplicate marks
+    exactly the transactions a sync would skip.
+    """
     start_date = datetime.now() - timedelta(days=days)
     end_date = datetime.now()
     
-    try:
-        transactions = await akahu.get_transactions(
-            account_id=account_id,
-            start_date=start_date,
-            end_date=end_date
+    pages = akahu.iter_transaction_pages(
+        account_id=account_id,
+        start_date=start_date,
+        end_date=end_date
+    )
+    
+    async def encode_page(page: List[AkahuTransaction]) -> bytes:
+        hashes = DeduplicationService.generate_hashes(
+            [tx.date for tx in page],
+            [tx.amount for tx in page],
+            [AkahuClient.derive_payee(tx) for tx in page],
+            [tx.description for tx in page],
+        )
+        # A short session per page, so no connection is held while Akahu pages load
+        async with session_factory() as db:
+            existing_hashes = await DeduplicationService(db).check_duplicates_bulk(hashes)
+        
+        return b",".join(
+            orjson.dumps({
+                "id": tx.id,
+                "account_id": tx.account_id,
+                "date": tx.date.isoformat(),
+                "amount": tx.amount,
+                "description": tx.description,
+                "merchant": tx.merchant,
+                "category": tx.category,
+                "is_duplicate": tx_hash in existing_hashes,
+                "transaction_hash": tx_hash
+            })
+            for tx, tx_hash in zip(page, hashes)
         )
+    
+    # Fetch and check the first page up front, so failures still surface as
+    # an error response before streaming starts
+    try:
+        first_page = await anext(pages, [])
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Failed to fetch transactions: {str(e)}"
         )
-    
-    # Check for duplicates
-    dedup = DeduplicationService(db)
-    existing_hashes = await dedup.get_existing_hashes()
-    
-    result = []
-    for tx in transactions:
-        tx_hash = dedup.generate_hash(tx.date, tx.amount, tx.merchant or tx.description)
-        result.append({
-            "id": tx.id,
-            "account_id": tx.account_id,
-            "date": tx.date.isoformat(),
-            "amount": tx.amount,
-            "description": tx.description,
-            "merchant": tx.merchant,
-            "category": tx.category,
-            "is_duplicate": tx_hash in existing_hashes,
-            "transaction_hash": tx_hash
-        })
-    
-    return result
+    try:
+        first_chunk = await encode_page(first_page) if first_page else b""
+    except Exception:
+        # Stop the page prefetcher before bailing out
+        await pages.aclose()
+        raise
+    
+    async def body() -> AsyncIterator[bytes]:
+        try:
+            separator = b"["
+            if first_chunk:
+                yield separator + first_chunk
+                separator = b","
+            async for page in pages:
+                if page:
+                    yield separator + await encode_page(page)
+                    separator = b","
+            yield b"]" if separator == b"," else b"[]"
+        finally:
+            await pages.aclose()
+    
+    return StreamingResponse(body(), media_type="application/json")
 
 
 @router.post("/sync/{akahu_account_id}")
@@ -191,155 +250,29 @@ async def sync_akahu_account(
     days: int = Query(default=30, ge=1, le=365),
     skip_duplicates: bool = True,
     force: bool = Query(default=False, description="Bypass local dedup cache — YNAB's own import_id check still prevents true duplicates"),
-    db: AsyncSession = Depends(get_db)
+    session_factory: async_sessionmaker[AsyncSession] = Depends(get_session_factory),
+    akahu: AkahuClient = Depends(get_akahu),
+    ynab: YNABClient = Depends(get_ynab)
 ):
     """Sync transactions from an Akahu account to its linked YNAB account."""
-    # Get the account link
-    result = await db.execute(
-        select(AkahuAccount).where(
-            AkahuAccount.akahu_account_id == akahu_account_id
+    try:
+        return await sync_account(
+            session_factory,
+            akahu,
+            ynab,
+            akahu_account_id,
+            days=days,
+            trigger='manual',
+            skip_duplicates=skip_duplicates,
+            force=force,
         )
-    )
-    link = result.scalar_one_or_none()
-    
-    if not link or not link.ynab_account_id:
+    except AccountNotLinkedError:
         raise HTTPException(
             status_code=400,
             detail="Akahu account is not linked to a YNAB account"
         )
-    
-    # Create sync log up front so every exit path is recorded
-    sync_log = SyncLog(
-        akahu_account_id=akahu_account_id,
-        account_name=link.account_name,
-        status='running',
-        trigger='manual',
-    )
-    db.add(sync_log)
-    await db.commit()
-    await db.refresh(sync_log)
-
-    async def _finish(status, message=None, **kwargs):
-        sync_log.status = status
-        sync_log.completed_at = datetime.utcnow()
-        if message:
-            sync_log.error_message = message
-        for k, v in kwargs.items():
-            setattr(sync_log, k, v)
-        await db.commit()
-
-    # Fetch transactions from Akahu
-    akahu = AkahuClient()
-    start_date = datetime.now() - timedelta(days=days)
-
-    try:
-        transactions = await akahu.get_account_transactions(
-            akahu_account_id,
-            start_date=start_date
-        )
-    except Exception as e:
-        await _finish('failed', message=str(e))
-        raise HTTPException(status_code=500, detail=f"Failed to fetch Akahu transactions: {str(e)}")
-
-    sync_log.transactions_found = len(transactions)
-
-    if not transactions:
-        await _finish('success', transactions_imported=0, transactions_skipped=0)
-        return {"imported": 0, "skipped_duplicates": 0, "message": "No transactions found"}
-
-    # Check for duplicates
-    dedup = DeduplicationService(db)
-    existing_hashes = await dedup.get_existing_hashes()
-
-    ynab_transactions = []
-    tx_creates = []
-    skipped = 0
-
-    for tx in transactions:
-        payee = tx.merchant or (tx.description[:50] if tx.description else None)
-        memo = tx.description
-        tx_hash = dedup.generate_hash(tx.date, tx.amount, payee, memo)
-
-        if skip_duplicates and not force and tx_hash in existing_hashes:
-            skipped += 1
-            continue
-
-        ynab_transactions.append({
-            "date": tx.date,
-            "amount": tx.amount,
-            "payee": payee,
-            "memo": memo
-        })
-
-        tx_creates.append(TransactionCreate(
-            date=tx.date,
-            amount=tx.amount,
-            payee=payee,
-            memo=memo,
-            source="akahu",
-            source_account=akahu_account_id,
-            source_transaction_id=tx.id
-        ))
-
-    if not ynab_transactions:
-        await _finish('success', transactions_imported=0, transactions_skipped=skipped)
-        return {"imported": 0, "skipped_duplicates": skipped, "message": "All transactions were duplicates"}
-
-    # Import to YNAB — omit import_id on force so YNAB doesn't reject
-    # previously-deleted transactions via its own import_id memory
-    ynab = YNABClient()
-    try:
-        import_result = await ynab.import_transactions(
-            link.ynab_budget_id,
-            link.ynab_account_id,
-            ynab_transactions,
-            use_import_id=not force,
-        )
-    except Exception as e:
-        await _finish('failed', message=str(e), transactions_skipped=skipped)
-        raise HTTPException(status_code=500, detail=f"Failed to import to YNAB: {str(e)}")
-
-    # Record successful imports — upsert when force=True so existing hashes
-    # get their YNAB ID updated rather than causing a unique constraint error
-    if force:
-        await dedup.upsert_imports_batch(
-            tx_creates,
-            link.ynab_budget_id,
-            link.ynab_account_id,
-            import_result.transaction_ids
-        )
-    else:
-        await dedup.record_imports_batch(
-            tx_creates,
-            link.ynab_budget_id,
-            link.ynab_account_id,
-            import_result.transaction_ids
-        )
-
-    link.last_synced_at = datetime.utcnow()
-    await _finish(
-        'success',
-        transactions_imported=len(import_result.transaction_ids),
-        transactions_skipped=skipped,
-        ynab_duplicates=len(import_result.duplicate_import_ids),
-    )
-    await db.refresh(sync_log)
-
-    # Balance check — reconcile if Akahu and YNAB totals diverge
-    await check_and_reconcile(db, link, sync_log)
-
-    return {
-        "imported": len(import_result.transaction_ids),
-        "ynab_duplicates": len(import_result.duplicate_import_ids),
-        "skipped_duplicates": skipped,
-        "transaction_ids": import_result.transaction_ids,
-        "balance_checked": sync_log.balance_checked,
-        "akahu_balance": sync_log.akahu_balance,
-        "ynab_balance": sync_log.ynab_balance,
-        "balance_matched": sync_log.balance_matched,
-        "reconciliation_triggered": sync_log.reconciliation_triggered,
-        "reconciliation_imported": sync_log.reconciliation_imported,
-    }
+    except SyncFailedError as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
 
 # Schedule endpoints
@@ -347,7 +280,7 @@ async def sync_akahu_account(
 @router.get("/accounts/{akahu_account_id}/schedule")
 async def get_account_schedule(
     akahu_account_id: str,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_readonly_db)
 ):
     """Get the sync schedule for an Akahu account."""
     result = await db.execute(
@@ -390,11 +323,8 @@ async def set_account_schedule(
             detail="Account must be linked to YNAB before enabling scheduled sync"
         )
     
-    # Validate interval
-    valid_intervals = [1, 2, 4, 6, 12, 24]
-    if config.interval_hours not in valid_intervals:
-        # Round to nearest valid interval
-        config.interval_hours = min(valid_intervals, key=lambda x: abs(x - config.interval_hours))
+    # Round to the nearest valid interval
+    config.interval_hours = NEAREST_INTERVAL[config.interval_hours]
     
     # Update schedule settings
     account.schedule_enabled = config.enabled
@@ -406,7 +336,6 @@ async def set_account_schedule(
     else:
         account.next_sync_at = None
     
-    account.updated_at = datetime.utcnow()
     await db.commit()
     
     # Update the scheduler
@@ -438,7 +367,6 @@ async def disable_account_schedule(
     
     account.schedule_enabled = False
     account.next_sync_at = None
-    account.updated_at = datetime.utcnow()
     await db.commit()
     
     # Remove from scheduler
@@ -461,20 +389,30 @@ async def cleanup_stale_sync_logs(db: AsyncSession = Depends(get_db)):
     return {"cleaned": count, "message": f"Marked {count} stale sync(s) as failed"}
 
 
+# Plain columns for the log listing, so no ORM objects are built per row.
+# Error messages come back in full: the UI shows them straight from the list.
+SYNC_LOG_LIST_COLUMNS = list(SyncLog.__table__.c)
+
+
 @router.get("/sync-logs", response_model=List[SyncLogResponse])
 async def get_sync_logs(
     akahu_account_id: Optional[str] = None,
     limit: int = Query(default=50, ge=1, le=200),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_readonly_db)
 ):
     """Get sync logs for all or a specific Akahu account."""
-    query = select(SyncLog).order_by(SyncLog.started_at.desc()).limit(limit)
+    # started_at has one-second resolution, so break ties by id
+    query = (
+        select(*SYNC_LOG_LIST_COLUMNS)
+        .order_by(SyncLog.started_at.desc(), SyncLog.id.desc())
+        .limit(limit)
+    )
     
     if akahu_account_id:
         query = query.where(SyncLog.akahu_account_id == akahu_account_id)
     
     result = await db.execute(query)
-    logs = result.scalars().all()
+    logs = result.mappings().all()
     
     return logs
 
@@ -482,7 +420,7 @@ async def get_sync_logs(
 @router.get("/sync-logs/{log_id}", response_model=SyncLogResponse)
 async def get_sync_log(
     log_id: int,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_readonly_db)
 ):
     """Get a specific sync log entry."""
     result = await db.execute(
@@ -1,38 +1,40 @@
+import asyncio
+from types import MappingProxyType
 from typing import List, Optional
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Form
+import orjson
+from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Form, Response
+from fastapi.responses import ORJSONResponse
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..dependencies import get_db
+from ..dependencies import get_db, get_readonly_db, get_ynab
 from ..services.csv_parser import CSVParser
 from ..services.dedup import DeduplicationService
 from ..services.ynab_client import YNABClient
-from ..schemas.transaction import TransactionPreview, TransactionCreate
+from ..schemas.transaction import TransactionCreate, TransactionImportRow, TransactionPreview
 
 router = APIRouter(prefix="/csv", tags=["CSV Import"])
 
+# Dumps a whole preview list in one pydantic-core call; the routes return it
+# directly so FastAPI doesn't re-validate every row (orjson turns the NaN cells
+# pandas leaves in raw_data into null)
+PREVIEW_LIST_ADAPTER = TypeAdapter(List[TransactionPreview])
+
+# The bank profiles are fixed, so look them up read-only and encode them once
+BANK_PROFILES = MappingProxyType(CSVParser.get_available_profiles())
+BANK_PROFILES_JSON = orjson.dumps(dict(BANK_PROFILES))
+
 
 @router.get("/profiles")
 async def get_bank_profiles():
     """Get available pre-configured bank profiles."""
-    return CSVParser.get_available_profiles()
+    return Response(BANK_PROFILES_JSON, media_type="application/json")
 
 
 @router.post("/detect-columns")
 async def detect_csv_columns(file: UploadFile = File(...)):
     """Detect columns in an uploaded CSV file."""
-    content = await file.read()
-    try:
-        csv_content = content.decode('utf-8')
-    except UnicodeDecodeError:
-        csv_content = content.decode('latin-1')
-    
-    columns = CSVParser.detect_columns(csv_content)
-    preview = CSVParser.preview_csv(csv_content, num_rows=5)
-    
-    return {
-        "columns": columns,
-        "preview": preview
-    }
+    return CSVParser.inspect_csv(file.file, num_rows=5)
 
 
 @router.post("/parse", response_model=List[TransactionPreview])
@@ -45,17 +47,14 @@ async def parse_csv(
     date_format: str = Form("%d/%m/%Y"),
     amount_inverted: bool = Form(False),
     skip_rows: int = Form(0),
-    db: AsyncSession = Depends(get_db)
+    include_raw: bool = Form(False),
+    db: AsyncSession = Depends(get_readonly_db)
 ):
     """
     Parse a CSV file and return transaction previews with duplicate detection.
+
+    Set include_raw to get each row's original cells back as raw_data.
     """
-    content = await file.read()
-    try:
-        csv_content = content.decode('utf-8')
-    except UnicodeDecodeError:
-        csv_content = content.decode('latin-1')
-    
     column_mappings = {
         "date": date_column,
         "amount": amount_column,
@@ -63,66 +62,68 @@ async def parse_csv(
         "memo": memo_column
     }
     
+    # Parsing is CPU-bound pandas work; keep it off the event loop
     parser = CSVParser()
-    transactions = parser.parse_csv(
-        csv_content=csv_content,
+    transactions = await asyncio.to_thread(
+        parser.parse_csv,
+        csv_content=file.file,
         column_mappings=column_mappings,
         date_format=date_format,
         amount_inverted=amount_inverted,
-        skip_rows=skip_rows
+        skip_rows=skip_rows,
+        include_raw=include_raw
     )
     
     # Check for duplicates
     dedup = DeduplicationService(db)
     transactions = await dedup.check_duplicates(transactions)
     
-    return transactions
+    return ORJSONResponse(PREVIEW_LIST_ADAPTER.dump_python(transactions, mode="json"))
 
 
 @router.post("/parse-with-profile", response_model=List[TransactionPreview])
 async def parse_csv_with_profile(
     file: UploadFile = File(...),
     profile_id: str = Form(...),
-    db: AsyncSession = Depends(get_db)
+    include_raw: bool = Form(False),
+    db: AsyncSession = Depends(get_readonly_db)
 ):
     """
     Parse a CSV file using a pre-configured bank profile.
+
+    Set include_raw to get each row's original cells back as raw_data.
     """
-    profiles = CSVParser.get_available_profiles()
-    if profile_id not in profiles:
+    profile = BANK_PROFILES.get(profile_id)
+    if profile is None:
         raise HTTPException(status_code=400, detail=f"Unknown profile: {profile_id}")
     
-    profile = profiles[profile_id]
-    
-    content = await file.read()
-    try:
-        csv_content = content.decode('utf-8')
-    except UnicodeDecodeError:
-        csv_content = content.decode('latin-1')
-    
+    # Parsing is CPU-bound pandas work; keep it off the event loop
     parser = CSVParser()
-    transactions = parser.parse_csv(
-        csv_content=csv_content,
+    transactions = await asyncio.to_thread(
+        parser.parse_csv,
+        csv_content=file.file,
         column_mappings=profile["column_mappings"],
         date_format=profile["date_format"],
         amount_inverted=profile["amount_inverted"],
-        skip_rows=profile["skip_rows"]
+        skip_rows=profile["skip_rows"],
+        include_raw=include_raw
     )
     
     # Check for duplicates
     dedup = DeduplicationService(db)
     transactions = await dedup.check_duplicates(transactions)
     
-    return transactions
+    return ORJSONResponse(PREVIEW_LIST_ADAPTER.dump_python(transactions, mode="json"))
 
 
 @router.post("/import")
 async def import_csv_transactions(
-    transactions: List[dict],
+    transactions: List[TransactionImportRow],
     ynab_budget_id: str,
     ynab_account_id: str,
     skip_duplicates: bool = True,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    ynab: YNABClient = Depends(get_ynab)
 ):
     """
     Import parsed CSV transactions to YNAB.
@@ -130,17 +131,18 @@ async def import_csv_transactions(
     if not transactions:
         raise HTTPException(status_code=400, detail="No transactions to import")
     
-    # Convert to TransactionCreate objects
+    # The request body has already been validated, so build the records
+    # without running validation a second time
     tx_creates = [
-        TransactionCreate(
-            date=tx['date'],
-            amount=tx['amount'],
-            payee=tx.get('payee'),
-            memo=tx.get('memo'),
+        TransactionCreate.model_construct(
+            date=tx.date,
+            amount=tx.amount,
+            payee=tx.payee,
+            memo=tx.memo,
             source="csv"
         )
         for tx in transactions
-        if not skip_duplicates or not tx.get('is_duplicate', False)
+        if not skip_duplicates or not tx.is_duplicate
     ]
     
     if not tx_creates:
@@ -151,18 +153,7 @@ async def import_csv_transactions(
         }
     
     # Import to YNAB
-    ynab = YNABClient()
-    tx_dicts = [
-        {
-            "date": tx.date,
-            "amount": tx.amount,
-            "payee": tx.payee,
-            "memo": tx.memo
-        }
-        for tx in tx_creates
-    ]
-    
-    result = await ynab.import_transactions(ynab_budget_id, ynab_account_id, tx_dicts)
+    result = await ynab.import_transactions(ynab_budget_id, ynab_account_id, tx_creates)
     
     # Record successful imports
     dedup = DeduplicationService(db)
@@ -172,6 +163,7 @@ async def import_csv_transactions(
         ynab_account_id,
         result.transaction_ids
     )
+    await db.commit()
     
     return {
         "imported": len(result.transaction_ids),
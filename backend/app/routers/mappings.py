@@ -1,22 +1,42 @@
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import ORJSONResponse
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import IntegrityError
 
-from ..dependencies import get_db
+from ..dependencies import get_db, get_readonly_db
 from ..models.database import MappingProfile
-from ..schemas.mapping import MappingProfileCreate, MappingProfileResponse
+from ..schemas.mapping import MappingProfileCreate, MappingProfileResponse, MappingProfileSummary
 
 router = APIRouter(prefix="/mappings", tags=["Mapping Profiles"])
 
+# Validates and serialises a whole profile list in one pydantic-core pass
+PROFILE_LIST_ADAPTER = TypeAdapter(List[MappingProfileSummary])
 
-@router.get("/", response_model=List[MappingProfileResponse])
-async def list_mapping_profiles(db: AsyncSession = Depends(get_db)):
-    """List all saved mapping profiles."""
+
+def _is_duplicate_name(exc: IntegrityError) -> bool:
+    """Whether an IntegrityError is the UNIQUE constraint on the profile name."""
+    # SQLite names the column, PostgreSQL the constraint
+    message = str(exc.orig)
+    return "mapping_profiles.name" in message or "mapping_profiles_name_key" in message
+
+
+@router.get("/", response_model=List[MappingProfileSummary])
+async def list_mapping_profiles(db: AsyncSession = Depends(get_readonly_db)):
+    """List all saved mapping profiles (summary fields; GET /{id} has the rest)."""
     result = await db.execute(
-        select(MappingProfile).order_by(MappingProfile.name)
+        select(
+            MappingProfile.id,
+            MappingProfile.name,
+            MappingProfile.description,
+            MappingProfile.is_default,
+            MappingProfile.updated_at,
+        ).order_by(MappingProfile.name)
     )
-    return list(result.scalars().all())
+    profiles = PROFILE_LIST_ADAPTER.validate_python(result.mappings().all())
+    return ORJSONResponse(PROFILE_LIST_ADAPTER.dump_python(profiles, mode="json"))
 
 
 @router.post("/", response_model=MappingProfileResponse)
@@ -25,28 +45,20 @@ async def create_mapping_profile(
     db: AsyncSession = Depends(get_db)
 ):
     """Create a new mapping profile."""
-    # Check if name already exists
-    result = await db.execute(
-        select(MappingProfile).where(MappingProfile.name == profile.name)
-    )
-    if result.scalar_one_or_none():
+    new_profile = MappingProfile(**profile.model_dump())
+    db.add(new_profile)
+    
+    # The UNIQUE constraint on name catches duplicates
+    try:
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        if not _is_duplicate_name(e):
+            raise
         raise HTTPException(
             status_code=400,
             detail=f"Profile with name '{profile.name}' already exists"
         )
-    
-    new_profile = MappingProfile(
-        name=profile.name,
-        description=profile.description,
-        column_mappings=profile.column_mappings,
-        date_format=profile.date_format,
-        amount_inverted=profile.amount_inverted,
-        skip_rows=profile.skip_rows,
-        default_ynab_account_id=profile.default_ynab_account_id
-    )
-    
-    db.add(new_profile)
-    await db.commit()
     await db.refresh(new_profile)
     
     return new_profile
@@ -55,7 +67,7 @@ async def create_mapping_profile(
 @router.get("/{profile_id}", response_model=MappingProfileResponse)
 async def get_mapping_profile(
     profile_id: int,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_readonly_db)
 ):
     """Get a specific mapping profile."""
     result = await db.execute(
@@ -76,35 +88,27 @@ async def update_mapping_profile(
     db: AsyncSession = Depends(get_db)
 ):
     """Update a mapping profile."""
-    result = await db.execute(
-        select(MappingProfile).where(MappingProfile.id == profile_id)
-    )
-    profile = result.scalar_one_or_none()
+    try:
+        result = await db.execute(
+            update(MappingProfile)
+            .where(MappingProfile.id == profile_id)
+            .values(**profile_data.model_dump())
+            .returning(MappingProfile)
+        )
+        profile = result.scalar_one_or_none()
+    except IntegrityError as e:
+        await db.rollback()
+        if not _is_duplicate_name(e):
+            raise
+        raise HTTPException(
+            status_code=400,
+            detail=f"Profile with name '{profile_data.name}' already exists"
+        )
     
     if not profile:
         raise HTTPException(status_code=404, detail="Profile not found")
     
-    # Check name uniqueness if changed
-    if profile_data.name != profile.name:
-        name_check = await db.execute(
-            select(MappingProfile).where(MappingProfile.name == profile_data.name)
-        )
-        if name_check.scalar_one_or_none():
-            raise HTTPException(
-                status_code=400,
-                detail=f"Profile with name '{profile_data.name}' already exists"
-            )
-    
-    profile.name = profile_data.name
-    profile.description = profile_data.description
-    profile.column_mappings = profile_data.column_mappings
-    profile.date_format = profile_data.date_format
-    profile.amount_inverted = profile_data.amount_inverted
-    profile.skip_rows = profile_data.skip_rows
-    profile.default_ynab_account_id = profile_data.default_ynab_account_id
-    
     await db.commit()
-    await db.refresh(profile)
     
     return profile
 
@@ -116,14 +120,14 @@ async def delete_mapping_profile(
 ):
     """Delete a mapping profile."""
     result = await db.execute(
-        select(MappingProfile).where(MappingProfile.id == profile_id)
+        delete(MappingProfile)
+        .where(MappingProfile.id == profile_id)
+        .returning(MappingProfile.id)
     )
-    profile = result.scalar_one_or_none()
     
-    if not profile:
+    if result.scalar_one_or_none() is None:
         raise HTTPException(status_code=404, detail="Profile not found")
     
-    await db.delete(profile)
     await db.commit()
     
     return {"status": "success", "message": "Profile deleted"}
@@ -135,23 +139,24 @@ async def set_default_profile(
     db: AsyncSession = Depends(get_db)
 ):
     """Set a profile as the default."""
-    # Clear existing default
-    result = await db.execute(
-        select(MappingProfile).where(MappingProfile.is_default == True)
-    )
-    for existing in result.scalars().all():
-        existing.is_default = False
-    
-    # Set new default
+    # Two UPDATEs in one transaction; the 404 path commits nothing
     result = await db.execute(
-        select(MappingProfile).where(MappingProfile.id == profile_id)
+        update(MappingProfile)
+        .where(MappingProfile.id == profile_id)
+        .values(is_default=True)
+        .returning(MappingProfile.name)
     )
-    profile = result.scalar_one_or_none()
+    name = result.scalar_one_or_none()
     
-    if not profile:
+    if name is None:
         raise HTTPException(status_code=404, detail="Profile not found")
     
-    profile.is_default = True
+    # Clear the previous default
+    await db.execute(
+        update(MappingProfile)
+        .where(MappingProfile.is_default == True, MappingProfile.id != profile_id)
+        .values(is_default=False)
+    )
     await db.commit()
     
-    return {"status": "success", "message": f"'{profile.name}' is now the default profile"}
+    return {"status": "success", "message": f"'{name}' is now the default profile"}
@@ -1,19 +1,33 @@
-from typing import List
+from typing import AsyncIterator, List
+import orjson
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from ..dependencies import get_db
+from ..dependencies import (
+    NDJSON_MEDIA_TYPE,
+    get_readonly_db,
+    get_readonly_session_factory,
+    get_ynab,
+    wants_ndjson,
+)
+from ..models.database import ImportedTransaction
 from ..services.ynab_client import YNABClient
 from ..services.dedup import DeduplicationService
 from ..schemas.ynab import YNABBudget, YNABAccount
 
 router = APIRouter(prefix="/ynab", tags=["YNAB"])
 
+# Whole-list serialisers; the routes return their output directly so FastAPI
+# doesn't re-validate every item
+BUDGET_LIST_ADAPTER = TypeAdapter(List[YNABBudget])
+ACCOUNT_LIST_ADAPTER = TypeAdapter(List[YNABAccount])
+
 
 @router.get("/test")
-async def test_ynab_connection():
+async def test_ynab_connection(ynab: YNABClient = Depends(get_ynab)):
     """Test the YNAB API connection."""
-    ynab = YNABClient()
     connected = await ynab.test_connection()
     
     if connected:
@@ -26,54 +40,69 @@ async def test_ynab_connection():
 
 
 @router.get("/budgets", response_model=List[YNABBudget])
-async def get_budgets():
+async def get_budgets(ynab: YNABClient = Depends(get_ynab)):
     """Get all YNAB budgets."""
-    ynab = YNABClient()
     try:
-        budgets = await ynab.get_budgets()
-        return budgets
+        budgets = await ynab.get_budgets_cached()
+        return ORJSONResponse(BUDGET_LIST_ADAPTER.dump_python(budgets, mode="json"))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/budgets/{budget_id}/accounts", response_model=List[YNABAccount])
-async def get_accounts(budget_id: str):
+async def get_accounts(budget_id: str, ynab: YNABClient = Depends(get_ynab)):
     """Get all accounts for a YNAB budget."""
-    ynab = YNABClient()
     try:
-        accounts = await ynab.get_accounts(budget_id)
-        return accounts
+        accounts = await ynab.get_accounts_cached(budget_id)
+        return ORJSONResponse(ACCOUNT_LIST_ADAPTER.dump_python(accounts, mode="json"))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _history_row(h: ImportedTransaction) -> dict:
+    return {
+        "id": h.id,
+        "date": h.date,
+        "amount": YNABClient.milliunits_to_dollars(h.amount_milliunits),
+        "payee": h.payee,
+        "memo": h.memo,
+        "source": h.source,
+        "imported_at": h.imported_at,
+        "ynab_transaction_id": h.ynab_transaction_id
+    }
+
+
 @router.get("/history")
 async def get_import_history(
     limit: int = 100,
     source: str = None,
-    db: AsyncSession = Depends(get_db)
+    ndjson: bool = Depends(wants_ndjson),
+    session_factory: async_sessionmaker[AsyncSession] = Depends(get_readonly_session_factory)
 ):
-    """Get import history."""
-    dedup = DeduplicationService(db)
-    history = await dedup.get_import_history(limit=limit, source=source)
+    """
+    Get import history.
+
+    Send `Accept: application/x-ndjson` to have rows streamed one per line
+    as they are read, instead of one JSON array.
+    """
+    if ndjson:
+        async def lines() -> AsyncIterator[bytes]:
+            async with session_factory() as db:
+                async for h in DeduplicationService(db).stream_import_history(limit=limit, source=source):
+                    yield orjson.dumps(_history_row(h)) + b"\n"
+        
+        return StreamingResponse(lines(), media_type=NDJSON_MEDIA_TYPE)
+    
+    async with session_factory() as db:
+        history = await DeduplicationService(db).get_import_history(limit=limit, source=source)
     
-    return [
-        {
-            "id": h.id,
-            "date": h.date.isoformat(),
-            "amount": h.amount,
-            "payee": h.payee,
-            "memo": h.memo,
-            "source": h.source,
-            "imported_at": h.imported_at.isoformat() if h.imported_at else None,
-            "ynab_transaction_id": h.ynab_transaction_id
-        }
-        for h in history
-    ]
+    # Returned as ORJSONResponse so the datetimes are encoded by orjson
+    # rather than walked by jsonable_encoder first
+    return ORJSONResponse([_history_row(h) for h in history])
 
 
 @router.get("/stats")
-async def get_import_stats(db: AsyncSession = Depends(get_db)):
+async def get_import_stats(db: AsyncSession = Depends(get_readonly_db)):
     """Get import statistics."""
     dedup = DeduplicationService(db)
     return await dedup.get_import_stats()
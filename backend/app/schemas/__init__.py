@@ -3,12 +3,14 @@ from .transaction import (
     TransactionCreate,
     TransactionResponse,
     TransactionImportRequest,
+    TransactionImportRow,
     TransactionPreview,
 )
 from .mapping import (
     MappingProfileBase,
     MappingProfileCreate,
     MappingProfileResponse,
+    MappingProfileSummary,
     ColumnMapping,
 )
 from .ynab import (
@@ -30,10 +32,12 @@ __all__ = [
     "TransactionCreate", 
     "TransactionResponse",
     "TransactionImportRequest",
+    "TransactionImportRow",
     "TransactionPreview",
     "MappingProfileBase",
     "MappingProfileCreate",
     "MappingProfileResponse",
+    "MappingProfileSummary",
     "ColumnMapping",
     "YNABBudget",
     "YNABAccount",
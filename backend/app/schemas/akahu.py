@@ -1,6 +1,6 @@
 from datetime import datetime
 from typing import Optional, List
-from pydantic import BaseModel, Field
+from pydantic import AliasPath, BaseModel, Field
 
 
 class AkahuAccountResponse(BaseModel):
@@ -25,13 +25,24 @@ class AkahuAccountResponse(BaseModel):
 
 
 class AkahuTransaction(BaseModel):
-    id: str
-    account_id: str
+    """A transaction, validated straight from Akahu's wire format."""
+    id: str = Field(validation_alias="_id")
+    account_id: str = Field(validation_alias="_account")
     date: datetime
     amount: float
-    description: str
-    merchant: Optional[str] = None
-    category: Optional[str] = None
+    description: str = ""
+    merchant: Optional[str] = Field(default=None, validation_alias=AliasPath("merchant", "name"))
+    category: Optional[str] = Field(default=None, validation_alias=AliasPath("category", "name"))
+
+
+class AkahuCursor(BaseModel):
+    next: Optional[str] = None
+
+
+class AkahuTransactionPage(BaseModel):
+    """One page of the /transactions response."""
+    items: List[AkahuTransaction] = []
+    cursor: Optional[AkahuCursor] = None
 
 
 class AkahuAccountLink(BaseModel):
@@ -33,3 +33,12 @@ class MappingProfileResponse(MappingProfileBase):
 
     class Config:
         from_attributes = True
+
+
+class MappingProfileSummary(BaseModel):
+    """Profile fields shown in the profile list."""
+    id: int
+    name: str
+    description: Optional[str] = None
+    is_default: bool = False
+    updated_at: datetime
@@ -35,6 +35,11 @@ class TransactionPreview(TransactionBase):
     raw_data: Optional[dict] = None
 
 
+class TransactionImportRow(TransactionBase):
+    """A transaction posted for CSV import; its hash is recomputed server-side."""
+    is_duplicate: bool = False
+
+
 class TransactionImportRequest(BaseModel):
     """Request to import transactions to YNAB."""
     transactions: List[TransactionCreate]
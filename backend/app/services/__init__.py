@@ -2,6 +2,7 @@ from .csv_parser import CSVParser
 from .ynab_client import YNABClient
 from .akahu_client import AkahuClient
 from .dedup import DeduplicationService
+from .account_sync import sync_account
 from .scheduler import (
     initialize_scheduler,
     shutdown_scheduler,
@@ -16,6 +17,7 @@ __all__ = [
     "YNABClient",
     "AkahuClient",
     "DeduplicationService",
+    "sync_account",
     "initialize_scheduler",
     "shutdown_scheduler",
     "schedule_account_sync",
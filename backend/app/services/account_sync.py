@@ -0,0 +1,226 @@
+"""
+Akahu → YNAB account sync, shared by the manual sync endpoint and the scheduler.
+
+Every database step opens its own short-lived session from the factory it is
+given, so no pooled connection is held while we wait on the Akahu or YNAB
+APIs.  Phases:
+
+    1. load the account link and open a 'running' sync log
+    2. fetch Akahu transactions and look their hashes up in the database
+    3. import the new transactions into YNAB
+    4. record the imports and close the sync log
+    5. balance check / reconciliation
+"""
+
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Set
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from ..models.database import AkahuAccount, SyncLog
+from .akahu_client import AkahuClient
+from .dedup import DeduplicationService
+from .reconciliation import check_and_reconcile
+from .ynab_client import YNABClient
+
+logger = logging.getLogger(__name__)
+
+
+class AccountNotLinkedError(Exception):
+    """The Akahu account is unknown or has no linked YNAB account."""
+
+
+class SyncFailedError(Exception):
+    """A sync step failed; the sync log has already been marked as failed."""
+
+
+async def _find_existing_hashes(
+    session_factory: async_sessionmaker[AsyncSession],
+    hashes: List[str],
+) -> Set[str]:
+    async with session_factory() as session:
+        return await DeduplicationService(session).check_duplicates_bulk(hashes)
+
+
+async def sync_account(
+    session_factory: async_sessionmaker[AsyncSession],
+    akahu: AkahuClient,
+    ynab: YNABClient,
+    akahu_account_id: str,
+    days: Optional[int] = None,
+    trigger: str = "manual",
+    skip_duplicates: bool = True,
+    force: bool = False,
+) -> Dict[str, Any]:
+    """
+    Sync one Akahu account into its linked YNAB account.
+
+    Args:
+        days: Look-back window; defaults to the account's schedule setting
+        trigger: 'manual' or 'scheduled' — scheduled runs also keep the
+                 account's last_sync_* and next_sync_at fields up to date
+        skip_duplicates: Skip transactions already recorded locally
+        force: Bypass the local dedup cache and omit YNAB import_ids, so
+               transactions deleted in YNAB can be imported again
+
+    Returns:
+        Summary dict (imported, skipped_duplicates, message, ...)
+
+    Raises:
+        AccountNotLinkedError: before anything is logged
+        SyncFailedError: when the Akahu fetch or YNAB import fails
+    """
+    scheduled = trigger == "scheduled"
+
+    # 1. Load the link and open the sync log
+    async with session_factory() as session:
+        result = await session.execute(
+            select(AkahuAccount).where(AkahuAccount.akahu_account_id == akahu_account_id)
+        )
+        link = result.scalar_one_or_none()
+
+        if not link or not link.ynab_account_id:
+            raise AccountNotLinkedError(akahu_account_id)
+
+        sync_log = SyncLog(
+            akahu_account_id=akahu_account_id,
+            account_name=link.account_name,
+            status='running',
+            trigger=trigger,
+        )
+        session.add(sync_log)
+        if scheduled:
+            link.last_sync_status = 'running'
+        await session.commit()
+
+    def _apply_outcome(status: str, message: Optional[str] = None, error: Optional[str] = None, **log_values):
+        """Copy a (final) outcome onto the sync log and, for scheduled runs, the link."""
+        # One timestamp for everything this outcome stamps
+        now = datetime.utcnow()
+        sync_log.status = status
+        sync_log.completed_at = now
+        if error:
+            sync_log.error_message = error
+        for key, value in log_values.items():
+            setattr(sync_log, key, value)
+
+        if scheduled:
+            link.last_sync_status = status
+            link.last_sync_message = message
+            if status == 'success':
+                link.last_sync_imported = log_values.get('transactions_imported', 0)
+                link.last_synced_at = now
+                link.next_sync_at = now + timedelta(hours=link.schedule_interval_hours)
+
+    async def _finish(status: str, message: Optional[str] = None, error: Optional[str] = None, **log_values):
+        async with session_factory() as session:
+            session.add_all([sync_log, link])
+            _apply_outcome(status, message, error, **log_values)
+            await session.commit()
+
+    # 2. Fetch from Akahu
+    days = days or link.schedule_days_to_sync or 7
+    start_date = datetime.now() - timedelta(days=days)
+
+    try:
+        transactions = await akahu.get_account_transactions(akahu_account_id, start_date=start_date)
+    except Exception as e:
+        await _finish('failed', message=str(e), error=str(e))
+        raise SyncFailedError(f"Failed to fetch Akahu transactions: {e}") from e
+
+    sync_log.transactions_found = len(transactions)
+
+    if not transactions:
+        message = 'No transactions found'
+        await _finish('success', message=message, transactions_imported=0, transactions_skipped=0)
+        return {"imported": 0, "skipped_duplicates": 0, "message": message}
+
+    tx_creates = [AkahuClient.to_transaction_create(tx) for tx in transactions]
+    if skip_duplicates and not force:
+        hashes = DeduplicationService.generate_hashes(
+            [record.date for record in tx_creates],
+            [record.amount for record in tx_creates],
+            [record.payee for record in tx_creates],
+            [record.memo for record in tx_creates],
+        )
+        # Indexed IN lookups for just this batch's hashes
+        try:
+            existing_hashes = await _find_existing_hashes(session_factory, hashes)
+        except Exception as e:
+            await _finish('failed', message=str(e), error=str(e))
+            raise
+        tx_creates = [
+            record for record, tx_hash in zip(tx_creates, hashes)
+            if tx_hash not in existing_hashes
+        ]
+    skipped = len(transactions) - len(tx_creates)
+
+    if not tx_creates:
+        message = f'All {skipped} transactions were duplicates'
+        await _finish('success', message=message, transactions_imported=0, transactions_skipped=skipped)
+        return {"imported": 0, "skipped_duplicates": skipped, "message": "All transactions were duplicates"}
+
+    # 3. Import to YNAB — omit import_id on force so YNAB doesn't reject
+    # previously-deleted transactions via its own import_id memory
+    try:
+        import_result = await ynab.import_transactions(
+            link.ynab_budget_id,
+            link.ynab_account_id,
+            tx_creates,
+            use_import_id=not force,
+        )
+    except Exception as e:
+        await _finish(
+            'failed',
+            message=f'YNAB import failed: {str(e)}',
+            error=str(e),
+            transactions_skipped=skipped,
+        )
+        raise SyncFailedError(f"Failed to import to YNAB: {str(e)}") from e
+
+    imported = len(import_result.transaction_ids)
+    message = f'Imported {imported} transactions'
+
+    # 4. Record successful imports — upsert when force=True so existing hashes
+    # get their YNAB ID updated rather than causing a unique constraint error
+    async with session_factory() as session:
+        session.add_all([sync_log, link])
+        dedup = DeduplicationService(session)
+        record_imports = dedup.upsert_imports_batch if force else dedup.record_imports_batch
+        _apply_outcome(
+            'success',
+            message=message,
+            transactions_imported=imported,
+            transactions_skipped=skipped,
+            ynab_duplicates=len(import_result.duplicate_import_ids),
+        )
+        link.last_synced_at = sync_log.completed_at
+        await record_imports(
+            tx_creates,
+            link.ynab_budget_id,
+            link.ynab_account_id,
+            import_result.transaction_ids
+        )
+        # One commit for the records, the sync log and the link updates
+        await session.commit()
+
+    # 5. Balance check — reconcile if Akahu and YNAB totals diverge
+    async with session_factory() as session:
+        session.add_all([sync_log, link])
+        await check_and_reconcile(session, link, sync_log, akahu, ynab)
+
+    return {
+        "imported": imported,
+        "ynab_duplicates": len(import_result.duplicate_import_ids),
+        "skipped_duplicates": skipped,
+        "transaction_ids": import_result.transaction_ids,
+        "message": message,
+        "balance_checked": sync_log.balance_checked,
+        "akahu_balance": sync_log.akahu_balance,
+        "ynab_balance": sync_log.ynab_balance,
+        "balance_matched": sync_log.balance_matched,
+        "reconciliation_triggered": sync_log.reconciliation_triggered,
+        "reconciliation_imported": sync_log.reconciliation_imported,
+    }
@@ -1,38 +1,48 @@
+import asyncio
+import time
 from datetime import datetime, timedelta
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional
 import httpx
+import orjson
 
 from ..config import get_settings
-from ..schemas.akahu import AkahuAccountResponse, AkahuTransaction
+from ..schemas.akahu import AkahuAccountResponse, AkahuTransaction, AkahuTransactionPage
+from ..schemas.transaction import TransactionCreate
+from .http_client import APIClient
 
 
-class AkahuClient:
+class AkahuClient(APIClient):
     """Client for Akahu API interactions."""
     
     BASE_URL = "https://api.akahu.io/v1"
+
+    # Seconds to reuse the account list before asking Akahu again
+    ACCOUNTS_CACHE_TTL = 120
+
+    # Transaction pages fetched ahead of the consumer
+    PAGE_PREFETCH = 2
     
     def __init__(self, app_token: Optional[str] = None, user_token: Optional[str] = None):
         settings = get_settings()
         self.app_token = app_token or settings.akahu_app_token
         self.user_token = user_token or settings.akahu_user_token
-        self.headers = {
+        super().__init__({
             "Authorization": f"Bearer {self.user_token}",
             "X-Akahu-Id": self.app_token,
             "Content-Type": "application/json"
-        }
+        })
+        self._accounts_cache: Optional[List[AkahuAccountResponse]] = None
+        self._accounts_expires_at = 0.0
     
-    async def _request(self, method: str, endpoint: str, params: dict = None) -> dict:
+    async def _send(self, method: str, endpoint: str, params: dict = None) -> httpx.Response:
         """Make an authenticated request to Akahu API."""
-        async with httpx.AsyncClient() as client:
-            response = await client.request(
-                method,
-                f"{self.BASE_URL}{endpoint}",
-                headers=self.headers,
-                params=params,
-                timeout=30.0
-            )
-            response.raise_for_status()
-            return response.json()
+        response = await self.client.request(method, endpoint, params=params)
+        response.raise_for_status()
+        return response
+    
+    async def _request(self, method: str, endpoint: str, params: dict = None) -> dict:
+        """Make an authenticated request and decode the JSON body."""
+        return orjson.loads((await self._send(method, endpoint, params=params)).content)
     
     async def get_accounts(self) -> List[AkahuAccountResponse]:
         """Get all connected bank accounts."""
@@ -50,22 +60,37 @@ class AkahuClient:
             for acc in accounts
         ]
     
-    async def get_transactions(
+    async def get_accounts_cached(self) -> List[AkahuAccountResponse]:
+        """
+        Get all connected bank accounts, reusing a recent response.
+
+        Returns copies so callers can enrich them without touching the cache.
+        """
+        if self._accounts_cache is None or time.monotonic() >= self._accounts_expires_at:
+            self._accounts_cache = await self.get_accounts()
+            self._accounts_expires_at = time.monotonic() + self.ACCOUNTS_CACHE_TTL
+        return [account.model_copy() for account in self._accounts_cache]
+
+    def invalidate_accounts_cache(self) -> None:
+        """Force the next get_accounts_cached() call to refetch."""
+        self._accounts_expires_at = 0.0
+    
+    async def iter_transaction_pages(
         self,
         account_id: Optional[str] = None,
         start_date: Optional[datetime] = None,
         end_date: Optional[datetime] = None
-    ) -> List[AkahuTransaction]:
+    ) -> AsyncIterator[List[AkahuTransaction]]:
         """
-        Get transactions from Akahu.
+        Yield transactions from Akahu one API page at a time.
         
         Args:
             account_id: Optional account ID to filter by
             start_date: Start date for transactions (default: 30 days ago)
             end_date: End date for transactions (default: today)
         
-        Returns:
-            List of AkahuTransaction objects
+        Yields:
+            Lists of AkahuTransaction objects, one per page fetched
         """
         # Default date range: last 30 days
         if not start_date:
@@ -78,37 +103,67 @@ class AkahuClient:
             "end": end_date.strftime("%Y-%m-%d")
         }
         
-        all_transactions = []
-        cursor = None
+        # Akahu only hands out the next cursor with each page, so pages can't
+        # be requested in parallel; instead a producer task fetches ahead
+        # while the caller works through the pages already received
+        # Akahu filters by account server-side on the per-account endpoint
+        endpoint = f"/accounts/{account_id}/transactions" if account_id else "/transactions"
         
-        # Paginate through all transactions
-        while True:
-            if cursor:
-                params["cursor"] = cursor
-            
-            data = await self._request("GET", "/transactions", params=params)
-            items = data.get("items", [])
-            
-            for tx in items:
-                # Filter by account if specified
-                if account_id and tx.get("_account") != account_id:
-                    continue
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.PAGE_PREFETCH)
+        producer = asyncio.create_task(self._produce_transaction_pages(endpoint, params, queue))
+        
+        try:
+            while True:
+                page = await queue.get()
+                if page is None:
+                    break
+                if isinstance(page, Exception):
+                    raise page
                 
-                all_transactions.append(AkahuTransaction(
-                    id=tx["_id"],
-                    account_id=tx["_account"],
-                    date=datetime.fromisoformat(tx["date"].replace("Z", "+00:00")),
-                    amount=tx["amount"],
-                    description=tx.get("description", ""),
-                    merchant=tx.get("merchant", {}).get("name"),
-                    category=tx.get("category", {}).get("name")
-                ))
-            
-            # Check for more pages
-            cursor = data.get("cursor", {}).get("next")
-            if not cursor:
-                break
+                yield page.items
+        finally:
+            producer.cancel()
+            try:
+                await producer
+            except asyncio.CancelledError:
+                pass
+    
+    async def _fetch_transaction_page(self, endpoint: str, params: dict) -> AkahuTransactionPage:
+        """Fetch one transactions page, validated from the raw bytes in one pydantic-core pass."""
+        response = await self._send("GET", endpoint, params=params)
+        return AkahuTransactionPage.model_validate_json(response.content)
+    
+    async def _produce_transaction_pages(self, endpoint: str, params: dict, queue: asyncio.Queue) -> None:
+        """Follow the cursor through every page, then put None (or the error) on the queue."""
+        try:
+            while True:
+                page = await self._fetch_transaction_page(endpoint, params)
+                await queue.put(page)
+                
+                # Check for more pages
+                cursor = page.cursor.next if page.cursor else None
+                if not cursor:
+                    break
+                params = {**params, "cursor": cursor}
+        except Exception as e:
+            await queue.put(e)
+            return
+        await queue.put(None)
+    
+    async def get_transactions(
+        self,
+        account_id: Optional[str] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> List[AkahuTransaction]:
+        """
+        Get transactions from Akahu.
         
+        Collects every page from iter_transaction_pages() into one list.
+        """
+        all_transactions = []
+        async for page in self.iter_transaction_pages(account_id, start_date, end_date):
+            all_transactions.extend(page)
         return all_transactions
     
     async def get_account_transactions(
@@ -124,6 +179,24 @@ class AkahuClient:
             end_date=end_date
         )
     
+    @staticmethod
+    def derive_payee(tx: AkahuTransaction) -> Optional[str]:
+        """Payee for YNAB: the merchant name, else the start of the description."""
+        return tx.merchant or (tx.description[:50] if tx.description else None)
+    
+    @classmethod
+    def to_transaction_create(cls, tx: AkahuTransaction) -> TransactionCreate:
+        """Convert an Akahu transaction to the record imported into YNAB."""
+        return TransactionCreate(
+            date=tx.date,
+            amount=tx.amount,
+            payee=cls.derive_payee(tx),
+            memo=tx.description,
+            source="akahu",
+            source_account=tx.account_id,
+            source_transaction_id=tx.id
+        )
+    
     def transactions_to_ynab_format(
         self,
         transactions: List[AkahuTransaction]
@@ -137,7 +210,7 @@ class AkahuClient:
             {
                 "date": tx.date,
                 "amount": tx.amount,
-                "payee": tx.merchant or tx.description[:50] if tx.description else None,
+                "payee": self.derive_payee(tx),
                 "memo": tx.description,
                 "source_transaction_id": tx.id
             }
@@ -1,10 +1,23 @@
-import hashlib
+import codecs
+import logging
+import re
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import BinaryIO, List, Dict, Any, Optional, Union
 from io import StringIO
+import numpy as np
 import pandas as pd
 
 from ..schemas.transaction import TransactionPreview, TransactionCreate
+from .dedup import DeduplicationService
+
+logger = logging.getLogger(__name__)
+
+# Currency symbols, thousands separators and whitespace stripped from amounts
+AMOUNT_CLEAN_RE = re.compile(r'[$,\s]')
+
+# Always the C tokenizer, reading each file in one pass so a column's dtype
+# isn't guessed chunk by chunk
+READ_CSV_OPTIONS = {"engine": "c", "low_memory": False}
 
 
 class CSVParser:
@@ -76,102 +89,181 @@ class CSVParser:
     
     @staticmethod
     def generate_transaction_hash(date: datetime, amount: float, payee: Optional[str], memo: Optional[str] = None) -> str:
-        """Generate a unique hash for a transaction."""
-        hash_input = f"{date.isoformat()}:{amount}:{payee or ''}:{memo or ''}"
-        return hashlib.sha256(hash_input.encode()).hexdigest()[:32]
+        """Generate a unique hash for a transaction (must match the dedup hash)."""
+        return DeduplicationService.generate_hash(date, amount, payee, memo)
     
     @staticmethod
     def get_available_profiles() -> Dict[str, Dict]:
         """Get all available bank profiles."""
         return CSVParser.BANK_PROFILES
     
+    # Bytes sampled from the start of an upload to pick its encoding
+    ENCODING_SNIFF_BYTES = 4096
+    
+    @staticmethod
+    def sniff_encoding(sample: bytes) -> str:
+        """Pick utf-8-sig (BOM), utf-8, or latin-1 from the start of a file."""
+        if sample.startswith(codecs.BOM_UTF8):
+            return 'utf-8-sig'
+        try:
+            # Incremental, so a character cut off at the sample's end is fine
+            codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+        except UnicodeDecodeError:
+            return 'latin-1'
+        return 'utf-8'
+    
+    @staticmethod
+    def read_csv(csv_content: Union[str, BinaryIO], **kwargs) -> pd.DataFrame:
+        """
+        Read CSV text, or a binary file from its start, into a DataFrame.
+        
+        Files are handed to pandas directly so it decodes them as it reads,
+        instead of the whole upload being held as bytes and then as text.
+        The encoding is sniffed from the first few KiB, so a Latin-1 file
+        is decoded once; a file that only turns out not to be UTF-8 past
+        the sample is re-read as Latin-1.
+        """
+        kwargs = {**READ_CSV_OPTIONS, **kwargs}
+        if isinstance(csv_content, str):
+            return pd.read_csv(StringIO(csv_content), **kwargs)
+        
+        csv_content.seek(0)
+        encoding = CSVParser.sniff_encoding(csv_content.read(CSVParser.ENCODING_SNIFF_BYTES))
+        csv_content.seek(0)
+        try:
+            return pd.read_csv(csv_content, encoding=encoding, **kwargs)
+        except UnicodeDecodeError:
+            csv_content.seek(0)
+            return pd.read_csv(csv_content, encoding='latin-1', **kwargs)
+    
     @staticmethod
-    def detect_columns(csv_content: str) -> List[str]:
+    def detect_columns(csv_content: Union[str, BinaryIO]) -> List[str]:
         """Detect columns in a CSV file."""
-        df = pd.read_csv(StringIO(csv_content), nrows=0)
+        df = CSVParser.read_csv(csv_content, nrows=0)
         return list(df.columns)
     
     @staticmethod
-    def preview_csv(csv_content: str, num_rows: int = 5) -> List[Dict[str, Any]]:
+    def preview_csv(csv_content: Union[str, BinaryIO], num_rows: int = 5) -> List[Dict[str, Any]]:
         """Preview the first few rows of a CSV file."""
-        df = pd.read_csv(StringIO(csv_content), nrows=num_rows)
+        df = CSVParser.read_csv(csv_content, nrows=num_rows)
         return df.to_dict(orient='records')
     
+    @staticmethod
+    def inspect_csv(csv_content: Union[str, BinaryIO], num_rows: int = 5) -> Dict[str, Any]:
+        """Detect columns and preview the first few rows from a single read."""
+        df = CSVParser.read_csv(csv_content, nrows=num_rows)
+        return {
+            "columns": list(df.columns),
+            "preview": df.to_dict(orient='records')
+        }
+    
     def parse_csv(
         self,
-        csv_content: str,
+        csv_content: Union[str, BinaryIO],
         column_mappings: Dict[str, str],
         date_format: str = "%d/%m/%Y",
         amount_inverted: bool = False,
         skip_rows: int = 0,
-        source_account: Optional[str] = None
+        source_account: Optional[str] = None,
+        include_raw: bool = False
     ) -> List[TransactionPreview]:
         """
         Parse CSV content and return transaction previews.
         
         Args:
-            csv_content: Raw CSV string
+            csv_content: Raw CSV string, or a binary file object
             column_mappings: Dict mapping transaction fields to CSV columns
                            e.g., {"date": "Transaction Date", "amount": "Amount"}
             date_format: strptime format string for parsing dates
             amount_inverted: If True, multiply amounts by -1
             skip_rows: Number of rows to skip at the start
             source_account: Optional account identifier
+            include_raw: Attach each row's original cells as raw_data
         
         Returns:
             List of TransactionPreview objects
         """
-        # Read CSV
-        df = pd.read_csv(StringIO(csv_content), skiprows=skip_rows)
+        # Read CSV; without raw_data only the mapped columns are needed, and
+        # a callable usecols leaves missing columns to the checks below
+        wanted = {column for column in column_mappings.values() if column}
+        df = self.read_csv(
+            csv_content,
+            skiprows=skip_rows,
+            usecols=None if include_raw else wanted.__contains__
+        )
+        
+        # Parse whole columns at once; rows whose date or amount doesn't
+        # parse come out as NaT/NaN and are dropped below
+        try:
+            date_values = df[column_mappings['date']]
+            amount_values = df[column_mappings['amount']]
+        except KeyError as e:
+            logger.warning(f"Error parsing CSV: missing column {e}")
+            return []
+        
+        # Statements repeat dates a lot; cache=True parses each distinct string
+        # once (pandas still skips the cache for columns of 50 values or fewer)
+        dates = pd.to_datetime(
+            date_values.astype(str).str.strip(), format=date_format, errors='coerce', cache=True
+        )
+        
+        # Remove currency symbols, commas and whitespace
+        amounts = pd.to_numeric(
+            amount_values.astype(str).str.replace(AMOUNT_CLEAN_RE, '', regex=True),
+            errors='coerce'
+        )
+        if amount_inverted:
+            amounts = -amounts
+        
+        # Parse optional fields; missing columns and empty cells become None
+        def text_column(field: str) -> pd.Series:
+            column = column_mappings.get(field)
+            if not column or column not in df.columns:
+                return pd.Series([None] * len(df), index=df.index, dtype=object)
+            values = df[column]
+            return pd.Series(
+                np.where(values.notna(), values.astype(str).str.strip(), None),
+                index=df.index,
+                dtype=object
+            )
         
-        transactions = []
-        for _, row in df.iterrows():
-            try:
-                # Parse date
-                date_str = str(row[column_mappings['date']]).strip()
-                date = datetime.strptime(date_str, date_format)
-                
-                # Parse amount
-                amount_str = str(row[column_mappings['amount']]).strip()
-                # Remove currency symbols and commas
-                amount_str = amount_str.replace('$', '').replace(',', '').replace(' ', '')
-                amount = float(amount_str)
-                
-                if amount_inverted:
-                    amount = -amount
-                
-                # Parse optional fields
-                payee = None
-                if 'payee' in column_mappings and column_mappings['payee']:
-                    payee_val = row.get(column_mappings['payee'])
-                    if pd.notna(payee_val):
-                        payee = str(payee_val).strip()
-                
-                memo = None
-                if 'memo' in column_mappings and column_mappings['memo']:
-                    memo_val = row.get(column_mappings['memo'])
-                    if pd.notna(memo_val):
-                        memo = str(memo_val).strip()
-                
-                # Generate hash
-                tx_hash = self.generate_transaction_hash(date, amount, payee, memo)
-                
-                transactions.append(TransactionPreview(
-                    date=date,
-                    amount=amount,
-                    payee=payee,
-                    memo=memo,
-                    is_duplicate=False,  # Will be updated by dedup service
-                    transaction_hash=tx_hash,
-                    raw_data=row.to_dict()
-                ))
-                
-            except Exception as e:
-                # Log error but continue processing
-                print(f"Error parsing row: {e}")
-                continue
+        payees = text_column('payee')
+        memos = text_column('memo')
         
-        return transactions
+        valid = dates.notna() & amounts.notna() & amounts.abs().ne(float('inf'))
+        skipped = len(df) - int(valid.sum())
+        if skipped:
+            # One line for the whole file, however many rows are bad
+            logger.warning(
+                f"Skipped {skipped} row(s) with an unparseable date or amount: "
+                f"rows {df.index[~valid].tolist()[:20]}"
+            )
+        if not valid.any():
+            return []
+        
+        dates = pd.DatetimeIndex(dates[valid]).to_pydatetime().tolist()
+        amounts = amounts[valid].astype(float).tolist()
+        payees = payees[valid].tolist()
+        memos = memos[valid].tolist()
+        # A dict per row is only worth building when the caller wants it
+        raw_rows = df[valid].to_dict(orient='records') if include_raw else [None] * len(dates)
+        hashes = DeduplicationService.generate_hashes(dates, amounts, payees, memos)
+        
+        # pandas has already produced datetimes, floats and str/None, so the
+        # previews are built without running pydantic validation per row
+        return [
+            TransactionPreview.model_construct(
+                date=date,
+                amount=amount,
+                payee=payee,
+                memo=memo,
+                is_duplicate=False,  # Will be updated by dedup service
+                transaction_hash=tx_hash,
+                raw_data=raw_data
+            )
+            for date, amount, payee, memo, raw_data, tx_hash
+            in zip(dates, amounts, payees, memos, raw_rows, hashes)
+        ]
     
     def to_transaction_creates(
         self,
@@ -179,8 +271,9 @@ class CSVParser:
         source_account: Optional[str] = None
     ) -> List[TransactionCreate]:
         """Convert previews to TransactionCreate objects for import."""
+        # The previews were validated when they were built or received
         return [
-            TransactionCreate(
+            TransactionCreate.model_construct(
                 date=p.date,
                 amount=p.amount,
                 payee=p.payee,
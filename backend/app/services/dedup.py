@@ -1,11 +1,25 @@
 import hashlib
 from datetime import datetime
-from typing import List, Optional, Set
-from sqlalchemy import select
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from sqlalchemy import bindparam, exists, func, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..models.database import ImportedTransaction
 from ..schemas.transaction import TransactionPreview, TransactionCreate
+from .ynab_client import YNABClient
+
+# BLAKE2b digest size in bytes; migrate.py rehashes stored rows if it changes
+HASH_DIGEST_SIZE = 16
+
+# Hashes per IN (...) lookup, well under SQLite's bound-parameter limit
+HASH_LOOKUP_CHUNK_SIZE = 500
+
+# Dialects whose INSERT supports ON CONFLICT DO NOTHING / DO UPDATE
+_UPSERT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
 
 
 class DeduplicationService:
@@ -21,16 +35,39 @@ class DeduplicationService:
         payee: Optional[str],
         memo: Optional[str] = None
     ) -> str:
-        """Generate a unique hash for a transaction."""
-        hash_input = f"{date.isoformat()}:{amount}:{payee or ''}:{memo or ''}"
-        return hashlib.sha256(hash_input.encode()).hexdigest()[:32]
+        """
+        Generate a unique hash for a transaction.
+
+        BLAKE2b is used rather than SHA-256: the hash only identifies
+        transactions, and BLAKE2b is markedly faster on short inputs. A
+        128-bit digest (32 hex characters) is plenty to tell them apart.
+        The amount is hashed as integer milliunits, so 10, 10.0 and
+        9.999999999 all produce the same hash.
+        """
+        return DeduplicationService.generate_hashes([date], [amount], [payee], [memo])[0]
     
-    async def get_existing_hashes(self) -> Set[str]:
-        """Get all existing transaction hashes from the database."""
-        result = await self.session.execute(
-            select(ImportedTransaction.transaction_hash)
-        )
-        return {row[0] for row in result.fetchall()}
+    @staticmethod
+    def generate_hashes(
+        dates: Sequence[datetime],
+        amounts: Sequence[float],
+        payees: Sequence[Optional[str]],
+        memos: Sequence[Optional[str]]
+    ) -> List[str]:
+        """
+        Hash a batch of transactions given as columns.
+
+        One tight loop with the hash and conversion functions bound locally,
+        so batches skip the per-row method dispatch of generate_hash().
+        """
+        blake2b = hashlib.blake2b
+        to_milliunits = YNABClient.dollars_to_milliunits
+        return [
+            blake2b(
+                f"{date.isoformat()}:{to_milliunits(amount)}:{payee or ''}:{memo or ''}".encode(),
+                digest_size=HASH_DIGEST_SIZE
+            ).hexdigest()
+            for date, amount, payee, memo in zip(dates, amounts, payees, memos)
+        ]
     
     async def check_duplicates(
         self,
@@ -41,21 +78,46 @@ class DeduplicationService:
         
         Returns the same list with is_duplicate flag updated.
         """
-        existing_hashes = await self.get_existing_hashes()
+        existing_hashes = await self.check_duplicates_bulk(
+            tx.transaction_hash for tx in transactions
+        )
         
         for tx in transactions:
             tx.is_duplicate = tx.transaction_hash in existing_hashes
         
         return transactions
     
+    async def check_duplicates_bulk(self, hashes: Iterable[str]) -> Set[str]:
+        """
+        Return which of the given hashes are already recorded.
+
+        Looks the hashes up against the unique transaction_hash index with
+        IN (...) queries, HASH_LOOKUP_CHUNK_SIZE at a time, rather than
+        loading every stored hash.
+        """
+        unique_hashes = list(dict.fromkeys(hashes))
+        existing: Set[str] = set()
+        
+        for start in range(0, len(unique_hashes), HASH_LOOKUP_CHUNK_SIZE):
+            chunk = unique_hashes[start:start + HASH_LOOKUP_CHUNK_SIZE]
+            result = await self.session.execute(
+                select(ImportedTransaction.transaction_hash).where(
+                    ImportedTransaction.transaction_hash.in_(chunk)
+                )
+            )
+            existing.update(result.scalars())
+        
+        return existing
+    
     async def is_duplicate(self, transaction_hash: str) -> bool:
         """Check if a specific transaction hash already exists."""
+        # EXISTS is answered from the unique index without loading the row
         result = await self.session.execute(
-            select(ImportedTransaction).where(
-                ImportedTransaction.transaction_hash == transaction_hash
+            select(
+                exists().where(ImportedTransaction.transaction_hash == transaction_hash)
             )
         )
-        return result.scalar_one_or_none() is not None
+        return bool(result.scalar())
     
     async def record_import(
         self,
@@ -69,7 +131,7 @@ class DeduplicationService:
         imported = ImportedTransaction(
             transaction_hash=transaction_hash,
             date=transaction.date,
-            amount=transaction.amount,
+            amount_milliunits=YNABClient.dollars_to_milliunits(transaction.amount),
             payee=transaction.payee,
             memo=transaction.memo,
             source=transaction.source,
@@ -77,8 +139,7 @@ class DeduplicationService:
             source_transaction_id=transaction.source_transaction_id,
             ynab_budget_id=ynab_budget_id,
             ynab_account_id=ynab_account_id,
-            ynab_transaction_id=ynab_transaction_id,
-            imported_at=datetime.utcnow()
+            ynab_transaction_id=ynab_transaction_id
         )
         
         self.session.add(imported)
@@ -87,6 +148,39 @@ class DeduplicationService:
         
         return imported
     
+    def _import_rows(
+        self,
+        transactions: List[TransactionCreate],
+        ynab_budget_id: str,
+        ynab_account_id: str,
+        ynab_transaction_ids: Optional[List[str]] = None
+    ) -> List[dict]:
+        """Build imported_transactions rows for a bulk INSERT."""
+        ynab_ids = ynab_transaction_ids or [None] * len(transactions)
+        hashes = self.generate_hashes(
+            [tx.date for tx in transactions],
+            [tx.amount for tx in transactions],
+            [tx.payee for tx in transactions],
+            [tx.memo for tx in transactions],
+        )
+        
+        return [
+            {
+                "transaction_hash": tx_hash,
+                "date": tx.date,
+                "amount_milliunits": YNABClient.dollars_to_milliunits(tx.amount),
+                "payee": tx.payee,
+                "memo": tx.memo,
+                "source": tx.source,
+                "source_account": tx.source_account,
+                "source_transaction_id": tx.source_transaction_id,
+                "ynab_budget_id": ynab_budget_id,
+                "ynab_account_id": ynab_account_id,
+                "ynab_transaction_id": ynab_id,
+            }
+            for tx, ynab_id, tx_hash in zip(transactions, ynab_ids, hashes)
+        ]
+    
     async def record_imports_batch(
         self,
         transactions: List[TransactionCreate],
@@ -97,34 +191,31 @@ class DeduplicationService:
         """
         Record multiple imported transactions at once.
         
+        The rows are flushed but not committed; the caller commits them
+        together with the rest of its unit of work.
+        
         Returns the number of transactions recorded.
         """
         if not transactions:
             return 0
         
-        ynab_ids = ynab_transaction_ids or [None] * len(transactions)
+        rows = self._import_rows(transactions, ynab_budget_id, ynab_account_id, ynab_transaction_ids)
         
-        for tx, ynab_id in zip(transactions, ynab_ids):
-            tx_hash = self.generate_hash(tx.date, tx.amount, tx.payee, tx.memo)
-            
-            imported = ImportedTransaction(
-                transaction_hash=tx_hash,
-                date=tx.date,
-                amount=tx.amount,
-                payee=tx.payee,
-                memo=tx.memo,
-                source=tx.source,
-                source_account=tx.source_account,
-                source_transaction_id=tx.source_transaction_id,
-                ynab_budget_id=ynab_budget_id,
-                ynab_account_id=ynab_account_id,
-                ynab_transaction_id=ynab_id,
-                imported_at=datetime.utcnow()
+        # One bulk INSERT; hashes that are already recorded are left alone
+        dialect_insert = _UPSERT_INSERTS.get(self.session.bind.dialect.name)
+        if dialect_insert is not None:
+            stmt = dialect_insert(ImportedTransaction).on_conflict_do_nothing(
+                index_elements=["transaction_hash"]
             )
-            self.session.add(imported)
+        else:
+            # No ON CONFLICT: leave out hashes that are already recorded
+            rows, _ = await self._split_recorded_rows(rows)
+            stmt = insert(ImportedTransaction)
         
-        await self.session.commit()
-        return len(transactions)
+        if rows:
+            await self.session.execute(stmt, rows)
+            await self.session.flush()
+        return len(rows)
     
     async def upsert_imports_batch(
         self,
@@ -140,59 +231,104 @@ class DeduplicationService:
         (but missing from YNAB) get their YNAB ID updated rather than causing
         a unique-constraint error.
 
+        Like record_imports_batch, this flushes and leaves the commit to the
+        caller.
+
         Returns the number of records upserted.
         """
         if not transactions:
             return 0
 
-        ynab_ids = ynab_transaction_ids or [None] * len(transactions)
+        rows = self._import_rows(transactions, ynab_budget_id, ynab_account_id, ynab_transaction_ids)
 
-        for tx, ynab_id in zip(transactions, ynab_ids):
-            tx_hash = self.generate_hash(tx.date, tx.amount, tx.payee, tx.memo)
+        dialect_insert = _UPSERT_INSERTS.get(self.session.bind.dialect.name)
+        if dialect_insert is None:
+            # No ON CONFLICT: bulk INSERT the new hashes, bulk UPDATE the rest
+            new_rows, recorded_rows = await self._split_recorded_rows(rows)
+            if new_rows:
+                await self.session.execute(insert(ImportedTransaction), new_rows)
+            updates = [
+                {"hash": row["transaction_hash"], "ynab_id": row["ynab_transaction_id"]}
+                for row in recorded_rows
+                if row["ynab_transaction_id"]
+            ]
+            if updates:
+                # Core table, as an ORM UPDATE with a parameter list
+                # expects to match rows by primary key
+                table = ImportedTransaction.__table__
+                await self.session.execute(
+                    update(table)
+                    .where(table.c.transaction_hash == bindparam("hash"))
+                    .values(ynab_transaction_id=bindparam("ynab_id")),
+                    updates,
+                )
+            await self.session.flush()
+            return len(transactions)
 
-            result = await self.session.execute(
-                select(ImportedTransaction).where(ImportedTransaction.transaction_hash == tx_hash)
-            )
-            existing = result.scalar_one_or_none()
-
-            if existing:
-                if ynab_id:
-                    existing.ynab_transaction_id = ynab_id
-            else:
-                self.session.add(ImportedTransaction(
-                    transaction_hash=tx_hash,
-                    date=tx.date,
-                    amount=tx.amount,
-                    payee=tx.payee,
-                    memo=tx.memo,
-                    source=tx.source,
-                    source_account=tx.source_account,
-                    source_transaction_id=tx.source_transaction_id,
-                    ynab_budget_id=ynab_budget_id,
-                    ynab_account_id=ynab_account_id,
-                    ynab_transaction_id=ynab_id,
-                    imported_at=datetime.utcnow(),
-                ))
+        # One bulk INSERT; recorded hashes only pick up the new YNAB ID
+        stmt = dialect_insert(ImportedTransaction)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["transaction_hash"],
+            set_={
+                "ynab_transaction_id": func.coalesce(
+                    stmt.excluded.ynab_transaction_id,
+                    ImportedTransaction.ynab_transaction_id,
+                )
+            },
+        )
 
-        await self.session.commit()
+        await self.session.execute(stmt, rows)
+        await self.session.flush()
         return len(transactions)
 
-    async def get_import_history(
-        self,
-        limit: int = 100,
-        source: Optional[str] = None
-    ) -> List[ImportedTransaction]:
-        """Get recent import history."""
+    async def _split_recorded_rows(self, rows: List[dict]) -> Tuple[List[dict], List[dict]]:
+        """
+        Split import rows into (new, already recorded) with one batch lookup.
+
+        A hash repeated within the batch only appears once among the new rows.
+        """
+        recorded = await self.check_duplicates_bulk(row["transaction_hash"] for row in rows)
+        new_rows: Dict[str, dict] = {}
+        recorded_rows = []
+        for row in rows:
+            if row["transaction_hash"] in recorded:
+                recorded_rows.append(row)
+            else:
+                new_rows.setdefault(row["transaction_hash"], row)
+        return list(new_rows.values()), recorded_rows
+
+    @staticmethod
+    def _import_history_query(limit: int, source: Optional[str]):
+        # CURRENT_TIMESTAMP has one-second resolution, so break ties by id
         query = select(ImportedTransaction).order_by(
-            ImportedTransaction.imported_at.desc()
+            ImportedTransaction.imported_at.desc(),
+            ImportedTransaction.id.desc()
         ).limit(limit)
         
         if source:
             query = query.where(ImportedTransaction.source == source)
         
-        result = await self.session.execute(query)
+        return query
+    
+    async def get_import_history(
+        self,
+        limit: int = 100,
+        source: Optional[str] = None
+    ) -> List[ImportedTransaction]:
+        """Get recent import history."""
+        result = await self.session.execute(self._import_history_query(limit, source))
         return list(result.scalars().all())
     
+    async def stream_import_history(
+        self,
+        limit: int = 100,
+        source: Optional[str] = None
+    ) -> AsyncIterator[ImportedTransaction]:
+        """Yield recent import history from a server-side cursor, 500 rows at a time."""
+        query = self._import_history_query(limit, source).execution_options(yield_per=500)
+        async for imported in await self.session.stream_scalars(query):
+            yield imported
+    
     async def get_import_stats(self) -> dict:
         """Get import statistics."""
         from sqlalchemy import func
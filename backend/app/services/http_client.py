@@ -0,0 +1,35 @@
+from typing import Dict, Optional
+import httpx
+
+
+class APIClient:
+    """Base for the API clients: one long-lived HTTP client per instance."""
+
+    BASE_URL = ""
+
+    def __init__(self, headers: Dict[str, str]):
+        self.headers = headers
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Long-lived HTTP client, so connections are kept alive between calls."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.BASE_URL,
+                headers=self.headers,
+                timeout=30.0,
+                limits=httpx.Limits(max_keepalive_connections=20)
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        """Close the underlying HTTP connections."""
+        if self._client is not None:
+            await self._client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
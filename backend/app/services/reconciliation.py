@@ -77,8 +77,7 @@ async def _reconcile_window(
     )
 
     seen_counts: dict[str, int] = {}
-    missing_ynab: list[dict] = []
-    missing_creates: list[TransactionCreate] = []
+    missing: list[TransactionCreate] = []
 
     for tx in akahu_txs:
         amount_milli = YNABClient.dollars_to_milliunits(tx.amount)
@@ -93,33 +92,20 @@ async def _reconcile_window(
         seen_counts[key] = occurrence
 
         if occurrence > ynab_counts.get(key, 0):
-            payee = tx.merchant or (tx.description[:50] if tx.description else None)
-            missing_ynab.append(
-                {"date": tx.date, "amount": tx.amount, "payee": payee, "memo": tx.description}
-            )
-            missing_creates.append(
-                TransactionCreate(
-                    date=tx.date,
-                    amount=tx.amount,
-                    payee=payee,
-                    memo=tx.description,
-                    source="akahu",
-                    source_account=link.akahu_account_id,
-                    source_transaction_id=tx.id,
-                )
-            )
+            missing.append(AkahuClient.to_transaction_create(tx))
 
-    if not missing_ynab:
+    if not missing:
         return 0
 
     import_result = await ynab.import_transactions(
         link.ynab_budget_id,
         link.ynab_account_id,
-        missing_ynab,
+        missing,
     )
 
+    # Committed by check_and_reconcile along with the pass's results
     await dedup.upsert_imports_batch(
-        missing_creates,
+        missing,
         link.ynab_budget_id,
         link.ynab_account_id,
         import_result.transaction_ids,
@@ -132,6 +118,8 @@ async def check_and_reconcile(
     session: AsyncSession,
     link: AkahuAccount,
     sync_log: SyncLog,
+    akahu: AkahuClient,
+    ynab: YNABClient,
 ) -> None:
     """
     Compare Akahu and YNAB balances and reconcile progressively if they don't match.
@@ -141,9 +129,6 @@ async def check_and_reconcile(
 
     Mutates *sync_log* with results and commits after each pass.
     """
-    akahu = AkahuClient()
-    ynab = YNABClient()
-
     # --- Fetch current balances ---
     try:
         akahu_balance, ynab_balance = await _fetch_balance(akahu, ynab, link)
@@ -1,41 +1,37 @@
 import asyncio
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Optional
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 from apscheduler.jobstores.memory import MemoryJobStore
-from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from ..config import get_settings
 from ..models.database import AkahuAccount, SyncLog
 from .akahu_client import AkahuClient
 from .ynab_client import YNABClient
-from .dedup import DeduplicationService
-from .reconciliation import check_and_reconcile
-from ..schemas.transaction import TransactionCreate
+from .account_sync import sync_account, AccountNotLinkedError, SyncFailedError
 
 logger = logging.getLogger(__name__)
 
 # Global scheduler instance
 _scheduler: Optional[AsyncIOScheduler] = None
-_engine = None
-_session_factory = None
 
+# The application's session factory, handed over by initialize_scheduler()
+_session_factory: Optional[async_sessionmaker[AsyncSession]] = None
+
+# Account syncs allowed to run at once when several jobs fire together
+MAX_CONCURRENT_SYNCS = 5
+_sync_slots = asyncio.Semaphore(MAX_CONCURRENT_SYNCS)
 
-async def get_scheduler_session() -> AsyncSession:
-    """Get a database session for the scheduler."""
-    global _engine, _session_factory
-    
-    if _engine is None:
-        settings = get_settings()
-        _engine = create_async_engine(settings.database_url, echo=False)
-        _session_factory = sessionmaker(_engine, class_=AsyncSession, expire_on_commit=False)
-    
-    return _session_factory()
+
+def get_scheduler_session_factory() -> async_sessionmaker[AsyncSession]:
+    """Get the session factory scheduled jobs use (the application's own)."""
+    if _session_factory is None:
+        raise RuntimeError("Scheduler is not initialized")
+    return _session_factory
 
 
 async def sync_akahu_account_job(akahu_account_id: str):
@@ -43,174 +39,44 @@ async def sync_akahu_account_job(akahu_account_id: str):
     Background job to sync an Akahu account.
     This runs in the scheduler context.
     """
+    # Jobs run as concurrent tasks on the event loop; cap how many hit the
+    # APIs and the database at the same time
+    async with _sync_slots:
+        await _run_account_sync(akahu_account_id)
+
+
+async def _run_account_sync(akahu_account_id: str):
     logger.info(f"Starting scheduled sync for Akahu account: {akahu_account_id}")
     
-    session = await get_scheduler_session()
+    session_factory = get_scheduler_session_factory()
     
-    try:
-        # Get the account link
-        result = await session.execute(
-            select(AkahuAccount).where(AkahuAccount.akahu_account_id == akahu_account_id)
-        )
-        link = result.scalar_one_or_none()
-        
-        if not link or not link.ynab_account_id:
-            logger.error(f"Account {akahu_account_id} not linked to YNAB")
-            return
-        
-        # Create sync log entry
-        sync_log = SyncLog(
-            akahu_account_id=akahu_account_id,
-            account_name=link.account_name,
-            status='running',
-            trigger='scheduled'
-        )
-        session.add(sync_log)
-        await session.commit()
-        
-        # Update account status
-        link.last_sync_status = 'running'
-        await session.commit()
-        
-        # Fetch transactions from Akahu
-        akahu = AkahuClient()
-        days_to_sync = link.schedule_days_to_sync or 7
-        start_date = datetime.now() - timedelta(days=days_to_sync)
-        
+    # One set of API clients per job, so connections are reused across calls
+    async with AkahuClient() as akahu, YNABClient() as ynab:
         try:
-            transactions = await akahu.get_account_transactions(
+            result = await sync_account(
+                session_factory,
+                akahu,
+                ynab,
                 akahu_account_id,
-                start_date=start_date
-            )
-        except Exception as e:
-            logger.error(f"Failed to fetch Akahu transactions: {e}")
-            sync_log.status = 'failed'
-            sync_log.error_message = str(e)
-            sync_log.completed_at = datetime.utcnow()
-            link.last_sync_status = 'failed'
-            link.last_sync_message = str(e)
-            await session.commit()
-            return
-        
-        sync_log.transactions_found = len(transactions)
-        
-        if not transactions:
-            sync_log.status = 'success'
-            sync_log.completed_at = datetime.utcnow()
-            link.last_sync_status = 'success'
-            link.last_sync_message = 'No transactions found'
-            link.last_sync_imported = 0
-            link.last_synced_at = datetime.utcnow()
-            link.next_sync_at = datetime.utcnow() + timedelta(hours=link.schedule_interval_hours)
-            await session.commit()
-            logger.info(f"Scheduled sync complete for {akahu_account_id}: no transactions")
-            return
-        
-        # Check for duplicates
-        dedup = DeduplicationService(session)
-        existing_hashes = await dedup.get_existing_hashes()
-        
-        # Convert to YNAB format and filter duplicates
-        ynab_transactions = []
-        tx_creates = []
-        skipped = 0
-        
-        for tx in transactions:
-            payee = tx.merchant or (tx.description[:50] if tx.description else None)
-            memo = tx.description
-            tx_hash = dedup.generate_hash(tx.date, tx.amount, payee, memo)
-
-            if tx_hash in existing_hashes:
-                skipped += 1
-                continue
-
-            ynab_transactions.append({
-                "date": tx.date,
-                "amount": tx.amount,
-                "payee": payee,
-                "memo": memo
-            })
-
-            tx_creates.append(TransactionCreate(
-                date=tx.date,
-                amount=tx.amount,
-                payee=payee,
-                memo=memo,
-                source="akahu",
-                source_account=akahu_account_id,
-                source_transaction_id=tx.id
-            ))
-        
-        sync_log.transactions_skipped = skipped
-        
-        if not ynab_transactions:
-            sync_log.status = 'success'
-            sync_log.completed_at = datetime.utcnow()
-            sync_log.transactions_imported = 0
-            link.last_sync_status = 'success'
-            link.last_sync_message = f'All {skipped} transactions were duplicates'
-            link.last_sync_imported = 0
-            link.last_synced_at = datetime.utcnow()
-            link.next_sync_at = datetime.utcnow() + timedelta(hours=link.schedule_interval_hours)
-            await session.commit()
-            logger.info(f"Scheduled sync complete for {akahu_account_id}: all duplicates")
-            return
-        
-        # Import to YNAB
-        ynab = YNABClient()
-        try:
-            import_result = await ynab.import_transactions(
-                link.ynab_budget_id,
-                link.ynab_account_id,
-                ynab_transactions
+                trigger='scheduled',
             )
+            logger.info(f"Scheduled sync complete for {akahu_account_id}: {result['message']}")
+        except AccountNotLinkedError:
+            logger.error(f"Account {akahu_account_id} not linked to YNAB")
+        except SyncFailedError as e:
+            logger.error(f"Scheduled sync failed for {akahu_account_id}: {e}")
         except Exception as e:
-            logger.error(f"Failed to import to YNAB: {e}")
-            sync_log.status = 'failed'
-            sync_log.error_message = str(e)
-            sync_log.completed_at = datetime.utcnow()
-            link.last_sync_status = 'failed'
-            link.last_sync_message = f'YNAB import failed: {str(e)}'
-            await session.commit()
-            return
-        
-        # Record successful imports
-        await dedup.record_imports_batch(
-            tx_creates,
-            link.ynab_budget_id,
-            link.ynab_account_id,
-            import_result.transaction_ids
-        )
-        
-        # Update sync log
-        sync_log.status = 'success'
-        sync_log.completed_at = datetime.utcnow()
-        sync_log.transactions_imported = len(import_result.transaction_ids)
-        sync_log.ynab_duplicates = len(import_result.duplicate_import_ids)
-
-        # Update account
-        link.last_sync_status = 'success'
-        link.last_sync_message = f'Imported {len(import_result.transaction_ids)} transactions'
-        link.last_sync_imported = len(import_result.transaction_ids)
-        link.last_synced_at = datetime.utcnow()
-        link.next_sync_at = datetime.utcnow() + timedelta(hours=link.schedule_interval_hours)
-
-        await session.commit()
-        logger.info(f"Scheduled sync complete for {akahu_account_id}: imported {len(import_result.transaction_ids)}")
-
-        # Balance check — reconcile if Akahu and YNAB totals diverge
-        await check_and_reconcile(session, link, sync_log)
-        
-    except Exception as e:
-        logger.exception(f"Error in scheduled sync for {akahu_account_id}: {e}")
-        try:
-            link.last_sync_status = 'failed'
-            link.last_sync_message = str(e)
-            await session.commit()
-        except:
-            pass
-    finally:
-        await session.close()
+            logger.exception(f"Error in scheduled sync for {akahu_account_id}: {e}")
+            try:
+                async with session_factory() as session:
+                    await session.execute(
+                        update(AkahuAccount)
+                        .where(AkahuAccount.akahu_account_id == akahu_account_id)
+                        .values(last_sync_status='failed', last_sync_message=str(e))
+                    )
+                    await session.commit()
+            except:
+                pass
 
 
 def get_scheduler() -> AsyncIOScheduler:
@@ -279,7 +145,7 @@ async def cleanup_stale_syncs(session: AsyncSession = None) -> int:
     """
     own_session = session is None
     if own_session:
-        session = await get_scheduler_session()
+        session = get_scheduler_session_factory()()
 
     try:
         # Find all stale sync logs
@@ -314,10 +180,16 @@ async def cleanup_stale_syncs(session: AsyncSession = None) -> int:
             await session.close()
 
 
-async def initialize_scheduler():
+async def initialize_scheduler(session_factory: async_sessionmaker[AsyncSession]):
     """
     Initialize the scheduler and load existing schedules from the database.
+
+    Scheduled jobs use *session_factory*, so they share the application's
+    engine and connection pool.
     """
+    global _session_factory
+    _session_factory = session_factory
+    
     scheduler = get_scheduler()
     
     if scheduler.running:
@@ -328,8 +200,7 @@ async def initialize_scheduler():
     logger.info("Scheduler started")
     
     # Load existing schedules from database
-    session = await get_scheduler_session()
-    try:
+    async with session_factory() as session:
         result = await session.execute(
             select(AkahuAccount).where(AkahuAccount.schedule_enabled == True)
         )
@@ -340,8 +211,6 @@ async def initialize_scheduler():
                 await schedule_account_sync(account)
         
         logger.info(f"Loaded {len(accounts)} scheduled accounts")
-    finally:
-        await session.close()
 
 
 async def shutdown_scheduler():
@@ -1,36 +1,43 @@
+import time
 from datetime import date, datetime
 from typing import Any, Dict, List, Optional, Tuple
-import httpx
+import orjson
 
 from ..config import get_settings
+from ..schemas.transaction import TransactionCreate
 from ..schemas.ynab import YNABBudget, YNABAccount, YNABTransactionCreate, YNABImportResult
+from .http_client import APIClient
 
 
-class YNABClient:
+class YNABClient(APIClient):
     """Client for YNAB API interactions."""
     
     BASE_URL = "https://api.ynab.com/v1"
+
+    # Seconds to reuse the budget and account lists before asking YNAB again
+    LISTS_CACHE_TTL = 60
     
     def __init__(self, access_token: Optional[str] = None):
         self.access_token = access_token or get_settings().ynab_access_token
-        self.headers = {
+        super().__init__({
             "Authorization": f"Bearer {self.access_token}",
             "Content-Type": "application/json"
-        }
+        })
+        self._budgets_cache: Optional[List[YNABBudget]] = None
+        self._budgets_expires_at = 0.0
+        # budget_id -> (accounts, expires_at)
+        self._accounts_cache: Dict[str, Tuple[List[YNABAccount], float]] = {}
     
     async def _request(self, method: str, endpoint: str, json_data: dict = None, params: dict = None) -> dict:
-        """Make an authenticated request to YNAB API."""
-        async with httpx.AsyncClient() as client:
-            response = await client.request(
-                method,
-                f"{self.BASE_URL}{endpoint}",
-                headers=self.headers,
-                json=json_data,
-                params=params,
-                timeout=30.0
-            )
-            response.raise_for_status()
-            return response.json()
+        """Make an authenticated request to YNAB API, with bodies encoded and decoded by orjson."""
+        response = await self.client.request(
+            method,
+            endpoint,
+            content=orjson.dumps(json_data) if json_data is not None else None,
+            params=params
+        )
+        response.raise_for_status()
+        return orjson.loads(response.content)
     
     async def get_budgets(self) -> List[YNABBudget]:
         """Get all budgets for the authenticated user."""
@@ -58,6 +65,33 @@ class YNABClient:
             if not a["deleted"]
         ]
     
+    async def get_budgets_cached(self) -> List[YNABBudget]:
+        """Get all budgets, reusing a recent response (as copies)."""
+        if self._budgets_cache is None or time.monotonic() >= self._budgets_expires_at:
+            self._budgets_cache = await self.get_budgets()
+            self._budgets_expires_at = time.monotonic() + self.LISTS_CACHE_TTL
+        return [budget.model_copy() for budget in self._budgets_cache]
+    
+    async def get_accounts_cached(self, budget_id: str) -> List[YNABAccount]:
+        """
+        Get all accounts for a budget, reusing a recent response.
+
+        Returns copies so callers can't change the cached accounts.
+        """
+        cached = self._accounts_cache.get(budget_id)
+        if cached is None or time.monotonic() >= cached[1]:
+            accounts = await self.get_accounts(budget_id)
+            cached = (accounts, time.monotonic() + self.LISTS_CACHE_TTL)
+            self._accounts_cache[budget_id] = cached
+        return [account.model_copy() for account in cached[0]]
+    
+    def invalidate_accounts_cache(self, budget_id: Optional[str] = None) -> None:
+        """Force the next get_accounts_cached() call for a budget (or all budgets) to refetch."""
+        if budget_id is None:
+            self._accounts_cache.clear()
+        else:
+            self._accounts_cache.pop(budget_id, None)
+    
     @staticmethod
     def dollars_to_milliunits(amount: float) -> int:
         """Convert dollar amount to YNAB milliunits."""
@@ -80,7 +114,7 @@ class YNABClient:
         self,
         budget_id: str,
         account_id: str,
-        transactions: List[dict],
+        transactions: List[TransactionCreate],
         use_import_id: bool = True,
     ) -> Tuple[List[str], List[str]]:
         """
@@ -89,7 +123,7 @@ class YNABClient:
         Args:
             budget_id: YNAB budget ID
             account_id: YNAB account ID
-            transactions: List of transaction dicts with date, amount, payee, memo
+            transactions: Transactions to create (date, amount, payee, memo are sent)
         
         Returns:
             Tuple of (created_transaction_ids, duplicate_import_ids)
@@ -99,15 +133,10 @@ class YNABClient:
         import_id_counts = {}  # Track occurrences for same amount/date
         
         for tx in transactions:
-            # Parse date
-            tx_date = tx['date']
-            if isinstance(tx_date, datetime):
-                tx_date = tx_date.date()
-            elif isinstance(tx_date, str):
-                tx_date = datetime.fromisoformat(tx_date).date()
+            tx_date = tx.date.date() if isinstance(tx.date, datetime) else tx.date
             
             # Convert amount to milliunits
-            amount_milliunits = self.dollars_to_milliunits(tx['amount'])
+            amount_milliunits = self.dollars_to_milliunits(tx.amount)
             
             # Generate import_id with occurrence tracking
             base_key = f"{amount_milliunits}:{tx_date.isoformat()}"
@@ -120,8 +149,8 @@ class YNABClient:
                 "account_id": account_id,
                 "date": tx_date.isoformat(),
                 "amount": amount_milliunits,
-                "payee_name": tx.get('payee'),
-                "memo": tx.get('memo'),
+                "payee_name": tx.payee,
+                "memo": tx.memo,
                 "cleared": "cleared",
                 "import_id": import_id
             }
@@ -133,6 +162,8 @@ class YNABClient:
             f"/budgets/{budget_id}/transactions",
             json_data={"transactions": ynab_transactions}
         )
+        # Account balances have moved
+        self.invalidate_accounts_cache(budget_id)
         
         result = data.get("data", {})
         
@@ -146,7 +177,7 @@ class YNABClient:
         self,
         budget_id: str,
         account_id: str,
-        transactions: List[dict],
+        transactions: List[TransactionCreate],
         use_import_id: bool = True,
     ) -> YNABImportResult:
         """
@@ -155,7 +186,7 @@ class YNABClient:
         Args:
             budget_id: YNAB budget ID
             account_id: YNAB account ID
-            transactions: List of transaction dicts
+            transactions: Transactions to import
             use_import_id: When False, omits import_id so YNAB skips its own
                            dedup — use for force re-imports of deleted transactions
 
@@ -16,6 +16,7 @@ The database path is resolved in this order:
   3. Default: ./data/yanb_sync.db
 """
 
+import hashlib
 import os
 import re
 import sqlite3
@@ -24,10 +25,72 @@ from datetime import datetime, timezone
 from pathlib import Path
 
 
+# ---------------------------------------------------------------------------
+# Data migrations
+# Python steps for changes that can't be expressed in SQL.  Each one is a
+# frozen snapshot of the logic at the time it was written — never import the
+# live application code here.
+# ---------------------------------------------------------------------------
+
+def table_exists(conn: sqlite3.Connection, table: str) -> bool:
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+    ).fetchone()
+    return row is not None
+
+
+def stored_transaction_date(value: str, source: str) -> datetime:
+    """Rebuild the datetime a transaction was hashed with from its stored value."""
+    parsed = datetime.fromisoformat(value)
+    # Akahu dates arrive as UTC ("...Z"); SQLite drops the offset on storage
+    if source == "akahu":
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def convert_amounts_and_rehash(conn: sqlite3.Connection) -> None:
+    """
+    Replace imported_transactions.amount (float dollars) with integer
+    amount_milliunits, and rehash every row with a 128-bit BLAKE2b digest of
+    the amount in milliunits (was truncated SHA-256 of the float amount).
+    """
+    # Tables created since this migration was written already have the
+    # current columns and hash format
+    if not table_exists(conn, "imported_transactions") or not column_exists(
+        conn, "imported_transactions", "amount"
+    ):
+        return
+
+    if not column_exists(conn, "imported_transactions", "amount_milliunits"):
+        conn.execute("ALTER TABLE imported_transactions ADD COLUMN amount_milliunits INTEGER")
+    conn.execute(
+        "UPDATE imported_transactions SET amount_milliunits = CAST(ROUND(amount * 1000) AS INTEGER)"
+    )
+    # Needs SQLite 3.35+
+    conn.execute("ALTER TABLE imported_transactions DROP COLUMN amount")
+    print("    ↳ imported_transactions.amount → amount_milliunits")
+
+    rows = conn.execute(
+        "SELECT id, date, amount_milliunits, payee, memo, source FROM imported_transactions"
+    ).fetchall()
+
+    for row_id, date, amount_milliunits, payee, memo, source in rows:
+        tx_date = stored_transaction_date(date, source)
+        hash_input = f"{tx_date.isoformat()}:{amount_milliunits}:{payee or ''}:{memo or ''}"
+        tx_hash = hashlib.blake2b(hash_input.encode(), digest_size=16).hexdigest()
+        conn.execute(
+            "UPDATE imported_transactions SET transaction_hash = ? WHERE id = ?",
+            (tx_hash, row_id),
+        )
+
+    print(f"    ↳ rehashed {len(rows)} imported transaction(s)")
+
+
 # ---------------------------------------------------------------------------
 # Migration definitions
 # Add new migrations to the end of this list.  Never change the version
-# number or SQL of an already-applied migration.
+# number or SQL of an already-applied migration.  A migration may also name a
+# data migration function under "python"; it runs after the SQL statements.
 # ---------------------------------------------------------------------------
 
 MIGRATIONS = [
@@ -58,6 +121,34 @@ MIGRATIONS = [
             "ALTER TABLE sync_logs ADD COLUMN account_name VARCHAR(255)",
         ],
     },
+    {
+        "version": 4,
+        "description": "Index sync_logs by started_at for newest-first listings",
+        "sql": [
+            "CREATE INDEX IF NOT EXISTS ix_sync_logs_started_at ON sync_logs (started_at)",
+            "CREATE INDEX IF NOT EXISTS ix_sync_logs_account_started ON sync_logs (akahu_account_id, started_at DESC)",
+        ],
+    },
+    {
+        "version": 5,
+        "description": "Index imported_transactions by source account and date",
+        "sql": [
+            "CREATE INDEX IF NOT EXISTS ix_imported_transactions_account_date ON imported_transactions (source_account, date)",
+        ],
+    },
+    {
+        "version": 6,
+        "description": "Store imported transaction amounts as integer milliunits and rehash with 128-bit BLAKE2b",
+        "sql": [],
+        "python": convert_amounts_and_rehash,
+    },
+    {
+        "version": 7,
+        "description": "Drop the unused imported_transactions account/date index",
+        "sql": [
+            "DROP INDEX IF EXISTS ix_imported_transactions_account_date",
+        ],
+    },
 ]
 
 
@@ -133,6 +224,9 @@ def run_migration(conn: sqlite3.Connection, migration: dict) -> None:
         conn.execute(statement)
         print(f"    ↳ {statement}")
 
+    if "python" in migration:
+        migration["python"](conn)
+
     conn.execute(
         "INSERT INTO schema_migrations (version, description, applied_at) VALUES (?, ?, ?)",
         (version, description, datetime.now(timezone.utc).isoformat()),
@@ -584,9 +584,13 @@ function app() {
         // History
         async loadHistory() {
             try {
-                const res = await fetch('/api/ynab/history?limit=100');
+                const res = await fetch('/api/ynab/history?limit=100', {
+                    headers: { 'Accept': 'application/x-ndjson' }
+                });
                 if (res.ok) {
-                    this.history = await res.json();
+                    const history = [];
+                    await this.readNDJSON(res, row => history.push(row));
+                    this.history = history;
                 }
             } catch (e) {
                 console.error('Failed to load history:', e);
@@ -655,6 +659,27 @@ function app() {
         },
         
         // Utilities
+        // Read a newline-delimited JSON response, handing each row over as it arrives
+        async readNDJSON(res, onRow) {
+            const reader = res.body.getReader();
+            const decoder = new TextDecoder();
+            let buffered = '';
+            
+            while (true) {
+                const { done, value } = await reader.read();
+                buffered += decoder.decode(value || new Uint8Array(), { stream: !done });
+                
+                const lines = buffered.split('\n');
+                buffered = lines.pop();
+                for (const line of lines) {
+                    if (line) onRow(JSON.parse(line));
+                }
+                
+                if (done) break;
+            }
+            if (buffered) onRow(JSON.parse(buffered));
+        },
+        
         formatDate(dateStr) {
             if (!dateStr) return '-';
             // Stored as naive UTC — append Z so the browser parses it correctly